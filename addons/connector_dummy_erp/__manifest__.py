@@ -1,6 +1,6 @@
 {
     "name": "Dummy ERP Connector",
-    "version": "16.0.0.1",
+    "version": "16.0.0.2",
     "summary": "Connect dummyjson API with Odoo.",
     "author": "Bashier Elbashier",
     "license": "Other proprietary",
@@ -10,8 +10,13 @@
     "data": [
         "security/security.xml",
         "security/ir.model.access.csv",
+        "data/dummy_erp_job_data.xml",
+        "data/dummy_erp_integration_data.xml",
         "views/dummy_erp_integration_views.xml",
         "views/dummy_erp_integration_log_views.xml",
+        "views/dummy_erp_job_views.xml",
+        "views/dummy_erp_integration_stats_views.xml",
+        "views/dummy_erp_webhook_event_views.xml",
         "views/product_template_views.xml"
     ],
 }
@@ -0,0 +1,71 @@
+import json
+import logging
+
+import requests
+
+from odoo import http
+from odoo.exceptions import UserError, ValidationError
+from odoo.http import request
+from odoo.tools.mimetypes import guess_mimetype
+
+from odoo.addons.web.controllers.binary import Binary
+
+from ..models.image_cache import get_lazy_image
+
+_logger = logging.getLogger(__name__)
+
+# Models whose images can be imported lazily, as their remote URL only. Imported users store their image on their
+# partner, which the avatars of users and partners are computed from.
+LAZY_IMAGE_MODELS = ("product.template", "product.product", "res.users", "res.partner")
+LAZY_IMAGE_FIELD_PREFIXES = ("image_", "avatar_")
+
+
+class DummyERPBinary(Binary):
+
+    # Override /web/image to serve the images of records imported without their image from the remote image cache
+    @http.route()
+    def content_image(self, xmlid=None, model='ir.attachment', id=None, field='raw', access_token=None, **kwargs):
+        if id and model in LAZY_IMAGE_MODELS and field.startswith(LAZY_IMAGE_FIELD_PREFIXES):
+            record = request.env["ir.binary"]._find_record(xmlid, model, int(id), access_token)
+            if record._name == "product.product" and not record.image_variant_1920:
+                record = record.product_tmpl_id
+            if record._name == "res.partner":
+                record = record.sudo().user_ids.filtered("dummy_erp_image_url")[:1]
+            if "dummy_erp_image_url" in record and record.sudo().dummy_erp_image_url and not record.image_1920:
+                try:
+                    data = get_lazy_image(record, field)
+                except (requests.RequestException, UserError) as exc:
+                    # Serve the placeholder until the remote image can be loaded
+                    _logger.warning("Cannot load the remote image of %s: %s", record, exc)
+                else:
+                    return request.make_response(data, headers=[
+                        ("Content-Type", guess_mimetype(data)),
+                        ("Content-Length", len(data)),
+                        ("Cache-Control", "no-cache"),
+                    ])
+        return super().content_image(xmlid=xmlid, model=model, id=id, field=field, access_token=access_token,
+                                     **kwargs)
+
+
+class DummyERPWebhook(http.Controller):
+
+    @http.route("/dummy_erp/webhook/<int:integration_id>", type="http", auth="public", methods=["POST"], csrf=False)
+    def receive_webhook(self, integration_id, **kwargs):
+        """
+        Receive change events of the remote ERP. The body is a JSON event, or a list of events, like
+        {"resource": "product", "action": "upsert", "data": {"id": 1, ...}} and it must be signed with the integration
+        webhook secret in the X-Dummy-ERP-Signature header. Events are only stored here, a job applies them in batches.
+        """
+        integration = request.env["dummy.erp.integration"].sudo().browse(integration_id).exists()
+        body = request.httprequest.get_data()
+        if not integration or not integration.active or not integration._check_webhook_signature(
+                body, request.httprequest.headers.get("X-Dummy-ERP-Signature")
+        ):
+            return request.make_json_response({"status": "error", "message": "Unauthorized"}, status=401)
+        try:
+            events = json.loads(body)
+            integration._receive_webhook_events(events if isinstance(events, list) else [events])
+        except (ValueError, ValidationError) as exc:
+            _logger.info("Rejected dummy ERP webhook of integration %s: %s", integration_id, exc)
+            return request.make_json_response({"status": "error", "message": str(exc)}, status=400)
+        return request.make_json_response({"status": "ok"}, status=202)
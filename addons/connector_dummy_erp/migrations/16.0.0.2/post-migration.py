@@ -0,0 +1,16 @@
+def migrate(cr, version):
+    """
+    Integration crons used to run the syncs themselves, now they only enqueue jobs for the job runner.
+    """
+    for method_name in ("import_dummy_products", "import_dummy_users", "export_dummy_carts", "export_dummy_products"):
+        cr.execute(
+            """
+            UPDATE ir_act_server
+               SET code = regexp_replace(code, %s, %s)
+             WHERE id IN (SELECT ir_actions_server_id FROM ir_cron WHERE dummy_erp_integration_id IS NOT NULL)
+            """,
+            (
+                r"model\.%s\((\d+)\)" % method_name,
+                r"model.enqueue_dummy_erp_job(\1, '%s')" % method_name,
+            ),
+        )
@@ -1,5 +1,9 @@
 from . import dummy_erp_integration
 from . import dummy_erp_integration_log
+from . import dummy_erp_integration_stats
+from . import dummy_erp_import_partition
+from . import dummy_erp_job
+from . import dummy_erp_webhook_event
 from . import ir_cron
 from . import product_template
 from . import res_users
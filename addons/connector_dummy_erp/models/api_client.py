@@ -1,5 +1,17 @@
+import time
+
 import requests
 
+from .sync_run import count_http_call
+from .traffic_archive import get_traffic_archive
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the circuit breaker of the integration is open, i.e. the remote ERP
+    failed too many times in a row and is not probed again yet.
+    """
+
 
 def get_headers():
     """
@@ -24,24 +36,83 @@ def get_request_url(integration, path):
     return integration._get_base_url() + path
 
 
-def perform_request(integration, method, payload, path, add_headers=None):
+def perform_request(integration, method, payload, path, add_headers=None, check_breaker=True):
     """Send HTTP request with given params
 
+    Connection errors and server errors are counted by the circuit breaker of the integration, and while the breaker
+    is open the request is not sent at all. Depending on the traffic mode of the integration, the exchange is recorded
+    to its traffic archive, or served from the archive without sending the request.
+
     Args:
         integration (object): dummy.erp.integration object
         method (str): HTTP method PUT, POST, ..
         payload (dict): payload
         path (str): path to the endpoint
         add_headers (dict): additional HTTP headers
+        check_breaker (bool): raise CircuitOpenError instead of sending the request if the breaker is open
 
     Returns:
         object: requests.response
     """
+    if integration.traffic_mode == "replay":
+        count_http_call()
+        return _replay(integration, method, get_request_url(integration, path), payload)
+    if check_breaker and not integration._breaker_allow_request():
+        raise CircuitOpenError(f"Dummy ERP integration {integration.name} is unreachable, request skipped")
+    count_http_call()
     if add_headers is None:
         add_headers = {}
     request_url = get_request_url(integration, path)
     # Merge headers
     headers = {**get_headers(), **add_headers}
 
-    response = requests.request(method, request_url, json=payload, headers=headers)
+    try:
+        start = time.perf_counter()
+        response = requests.request(method, request_url, json=payload, headers=headers)
+    except requests.RequestException:
+        integration._breaker_record_failure()
+        raise
+    if response.status_code >= 500:
+        integration._breaker_record_failure()
+    else:
+        integration._breaker_record_success()
+    if integration.traffic_mode == "record":
+        get_traffic_archive(integration.sudo().traffic_archive_path).record(
+            method, request_url, payload, response, time.perf_counter() - start
+        )
     return response
+
+
+def fetch_url(integration, url):
+    """Download a resource of the remote ERP outside its API, like product and user images
+
+    Downloads are recorded and replayed with the API requests when the integration captures its traffic.
+
+    Args:
+        integration (object): dummy.erp.integration object
+        url (str): full URL of the resource
+
+    Raises:
+        requests.HTTPError: the remote ERP answered with an error status, its body is not the resource
+
+    Returns:
+        bytes: content of the resource
+    """
+    count_http_call()
+    if integration.traffic_mode == "replay":
+        response = _replay(integration, "GET", url, None)
+    else:
+        start = time.perf_counter()
+        response = requests.get(url)
+        if integration.traffic_mode == "record":
+            get_traffic_archive(integration.sudo().traffic_archive_path).record(
+                "GET", url, None, response, time.perf_counter() - start
+            )
+    response.raise_for_status()
+    return response.content
+
+
+def _replay(integration, method, url, payload):
+    return get_traffic_archive(integration.sudo().traffic_archive_path).replay(
+        method, url, payload, latency_scale=integration.traffic_latency_scale
+    )
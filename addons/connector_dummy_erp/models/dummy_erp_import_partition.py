@@ -0,0 +1,25 @@
+from odoo import models, fields
+
+
+class DummyERPImportPartition(models.Model):
+    _name = 'dummy.erp.import.partition'
+    _description = 'Dummy ERP Import Partition'
+    _order = "id desc"
+
+    """
+    A skip/limit range of the remote catalog imported by its own job in a partitioned import. The partitions of one
+    import share its run key, the import is complete once all of them are done.
+    """
+
+    integration_id = fields.Many2one(
+        "dummy.erp.integration", "Dummy ERP Integration", required=1, ondelete="cascade"
+    )
+    resource = fields.Selection([("products", "Products"), ("users", "Users")], required=1)
+    run_key = fields.Char("Run", required=1, index=True)
+    offset = fields.Integer("Skip")
+    limit = fields.Integer("Limit")
+    state = fields.Selection([("pending", "Pending"), ("done", "Done")], default="pending", required=1)
+    record_count = fields.Integer("Imported Records")
+    # JSON list of the remote ids of the partition, needed to reconcile deletions once all partitions are done
+    remote_ids = fields.Text("Remote IDs")
+    company_id = fields.Many2one(related="integration_id.company_id", store=1)
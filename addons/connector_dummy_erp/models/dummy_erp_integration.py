@@ -1,8 +1,24 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import random
+import secrets
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+import requests
+
 from odoo import models, fields, api, _
 
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 
-from .api_client import perform_request
+from .api_client import perform_request, CircuitOpenError
+from .dummy_erp_job import is_testing
+from .sync_run import SyncRun, count_records, current_run, sync_stage
+from .traffic_archive import get_traffic_archive
+from .transform import parse_product, parse_user
 
 # Define path for each operation, we set limit=0 to get all
 # records since they are not too much in this case; implementing
@@ -10,14 +26,81 @@ from .api_client import perform_request
 DUMMY_JSON_PATHS = {
     "test": "/test",
     "get_products": "/products?limit=0",
+    "get_products_page": "/products?limit=%s&skip=%s",
     "get_user_carts": "/users/%s/carts?limit=0",
     "get_users": "/users?limit=0",
+    "get_users_page": "/users?limit=%s&skip=%s",
     "update_cart": "/carts",
     "add_cart": "/carts/add",
     "update_product": "/products",
     "add_product": "/products/add"
 }
 
+# Channel (dummy.erp.job.channel code) used to run each integration method as a job
+JOB_CHANNELS = {
+    "import_dummy_products": "import",
+    "import_dummy_users": "import",
+    "export_dummy_products": "export",
+    "export_dummy_carts": "export",
+    "import_dummy_user_carts": "login_cart",
+    "apply_dummy_erp_webhook_events": "webhook",
+    "import_dummy_partition": "import_partition",
+}
+
+# Models imported from each remote resource
+RESOURCE_MODELS = {
+    "products": "product.template",
+    "users": "res.users",
+}
+
+# Number of records exported between two commits of an export job
+EXPORT_BATCH_SIZE = 200
+
+# Maximum number of webhook events applied by one job, the remaining events are applied by a follow-up job
+WEBHOOK_BATCH_LIMIT = 500
+
+# Scheduled syncs: (integration method, automation field, cron field, next run field, interval field)
+SCHEDULED_SYNCS = [
+    ("import_dummy_products", "auto_import_product", "import_product_cron_id", "next_import_product_date",
+     "import_interval"),
+    ("import_dummy_users", "auto_import_user", "import_user_cron_id", "next_import_user_date", "import_interval"),
+    ("export_dummy_carts", "auto_export_cart", "export_cart_cron_id", "next_export_cart_date", "export_interval"),
+    ("export_dummy_products", "auto_export_product", "export_product_cron_id", "next_export_product_date",
+     "export_interval"),
+]
+
+# Context of bulk imports: no mail tracking, creation message, followers or password reset email per record
+BULK_IMPORT_CONTEXT = {
+    "tracking_disable": True,
+    "mail_create_nolog": True,
+    "mail_create_nosubscribe": True,
+    "mail_notrack": True,
+    "no_reset_password": True,
+}
+
+# Default number of integrations the dispatcher lets sync at the same time, it can be changed with the
+# "connector_dummy_erp.dispatcher_max_concurrency" system parameter
+DISPATCHER_MAX_CONCURRENCY = 4
+# Maximum random delay added to the next run of a sync, as a ratio of its interval, so integrations do not all poll
+# the remote ERP at the same time
+DISPATCHER_JITTER_RATIO = 0.1
+
+
+def sync_run_method(job_type):
+    """
+    Decorator of the integration sync methods, which take the integration id as first argument: measure each call as
+    a run of the given job type, see DummyERPIntegration._sync_run.
+    :param job_type: name of the sync, e.g. import_dummy_products
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, integration_id, *args, **kwargs):
+            integration = self.with_context(active_test=False).browse(integration_id)
+            with integration._sync_run(job_type):
+                return method(self, integration_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class DummyERPIntegration(models.Model):
     _name = 'dummy.erp.integration'
@@ -44,6 +127,21 @@ class DummyERPIntegration(models.Model):
     auto_export_cart = fields.Boolean("Auto Export Carts", default=False, tracking=True)
     auto_export_product = fields.Boolean("Auto Export Products", default=False, tracking=True)
 
+    # Scheduling fields
+    scheduling_mode = fields.Selection(
+        [("cron", "One Cron per Sync"), ("dispatcher", "Shared Dispatcher")],
+        default="cron", required=1, tracking=True,
+        help="One Cron per Sync: every sync of this integration has its own scheduled action.\n"
+             "Shared Dispatcher: a single scheduled action enqueues the due syncs of all integrations, with "
+             "staggered start times and a global concurrency limit."
+    )
+    import_interval = fields.Integer("Import Interval (minutes)", default=20, tracking=True)
+    export_interval = fields.Integer("Export Interval (minutes)", default=2, tracking=True)
+    next_import_product_date = fields.Datetime("Next Products Import", copy=False)
+    next_import_user_date = fields.Datetime("Next Users Import", copy=False)
+    next_export_cart_date = fields.Datetime("Next Carts Export", copy=False)
+    next_export_product_date = fields.Datetime("Next Products Export", copy=False)
+
     # Cron IDS
     import_product_cron_id = fields.Many2one("ir.cron")
     import_user_cron_id = fields.Many2one("ir.cron")
@@ -56,6 +154,103 @@ class DummyERPIntegration(models.Model):
     )
     cron_count = fields.Integer("Jobs", compute="_compute_cron_count")
     integration_log_ids = fields.One2many("dummy.erp.integration.log", "integration_id")
+    job_ids = fields.One2many("dummy.erp.job", "integration_id")
+    job_count = fields.Integer("Queued Jobs", compute="_compute_job_count")
+
+    # Job queue fields
+    job_chunk_size = fields.Integer("Job Chunk Size", default=50,
+                                    help="Number of records handled by each job when a sync is split into jobs")
+    partition_size = fields.Integer(
+        "Partition Size", default=0,
+        help="When an import runs as a job, split the remote catalog into ranges of this many records, each fetched "
+             "and imported by its own job in parallel. 0 fetches the whole catalog in a single job."
+    )
+    # Products and users are imported by independent partitioned imports, each with its own run
+    products_partition_run_key = fields.Char("Running Partitioned Product Import", copy=False, readonly=1)
+    products_partition_run_start = fields.Datetime("Partitioned Product Import Started On", copy=False, readonly=1)
+    users_partition_run_key = fields.Char("Running Partitioned User Import", copy=False, readonly=1)
+    users_partition_run_start = fields.Datetime("Partitioned User Import Started On", copy=False, readonly=1)
+    partition_ids = fields.One2many("dummy.erp.import.partition", "integration_id")
+
+    bulk_import = fields.Boolean(
+        "Bulk Import", default=False, tracking=True,
+        help="Import records in batches of Job Chunk Size without mail tracking, chatter messages and followers, "
+             "with one creation and one flush per batch instead of one per record."
+    )
+
+    lazy_images = fields.Boolean(
+        "Lazy Images", default=False, tracking=True,
+        help="Import only the remote image URL of products and users. Images are downloaded into a disk cache when "
+             "they are first displayed and stored in Odoo only once they are displayed again."
+    )
+
+    page_size = fields.Integer(
+        "Page Size", default=0,
+        help="Number of records fetched per request when importing, 0 fetches all records in a single request."
+    )
+    transform_processes = fields.Integer(
+        "Transform Processes", default=0,
+        help="Number of processes mapping very large imported payloads in parallel, 0 maps them in the Odoo worker."
+    )
+    reconcile_deletions = fields.Boolean(
+        "Archive Remotely Deleted Records", default=False, tracking=True,
+        help="After fetching all remote products or users, archive the imported ones which no longer exist remotely."
+    )
+    sql_fast_path = fields.Boolean(
+        "SQL Fast Path", default=False, tracking=True,
+        help="Update existing products whose price, stock, rating or brand are the only changes with plain SQL "
+             "statements instead of the ORM."
+    )
+    profile_next_run = fields.Boolean(
+        "Profile Next Run", default=False, copy=False, tracking=True,
+        help="Profile the next import or export run and attach the profile to its log entry. The profiled run does "
+             "the whole sync itself instead of splitting it into jobs, and the switch is turned off automatically."
+    )
+
+    # Webhook fields
+    webhook_secret = fields.Char("Webhook Secret", copy=False, groups="base.group_system",
+                                 help="Key of the HMAC-SHA256 signature of the webhook requests of the remote ERP")
+    webhook_batch_delay = fields.Integer("Webhook Batch Delay (seconds)", default=5,
+                                         help="Delay during which received events are gathered before being applied")
+    webhook_url = fields.Char("Webhook URL", compute="_compute_webhook_url")
+    webhook_event_ids = fields.One2many("dummy.erp.webhook.event", "integration_id")
+
+    # Cart export debounce fields
+    cart_quiet_period = fields.Integer(
+        "Cart Quiet Period (seconds)", default=30,
+        help="Carts are exported once they have not changed for this delay, so intermediate states of a cart being "
+             "edited are not pushed to the remote ERP."
+    )
+    cart_max_delay = fields.Integer(
+        "Cart Maximum Delay (seconds)", default=300,
+        help="Carts which keep changing are exported anyway once their first unexported change is this old."
+    )
+
+    # Traffic capture fields
+    traffic_mode = fields.Selection(
+        [("off", "Off"), ("record", "Record"), ("replay", "Replay")],
+        string="Traffic Capture", default="off", required=1, tracking=True,
+        help="Record: write every request of the integration, images included, with its response to the traffic "
+             "archive.\nReplay: serve the requests from the traffic archive, without network, to reproduce a run "
+             "offline."
+    )
+    traffic_archive_path = fields.Char("Traffic Archive", groups="base.group_system",
+                                       help="Path of the zip file of the recorded traffic on the Odoo server")
+    traffic_latency_scale = fields.Float("Replay Latency Scale", default=1.0,
+                                         help="Multiplier of the recorded response times when replaying, "
+                                              "0 replays without waiting")
+
+    # Circuit breaker fields, shared by all workers through the database
+    breaker_threshold = fields.Integer("Failures Before Opening", default=5,
+                                       help="Consecutive failed requests after which requests are skipped")
+    breaker_reset_interval = fields.Integer("Probe Interval (seconds)", default=120,
+                                            help="Delay between two connection probes while requests are skipped")
+    breaker_state = fields.Selection(
+        [("closed", "Closed"), ("open", "Open"), ("half_open", "Probing")],
+        string="Circuit Breaker", default="closed", required=1, readonly=1, copy=False
+    )
+    breaker_failure_count = fields.Integer("Consecutive Failures", readonly=1, copy=False)
+    breaker_opened_at = fields.Datetime("Breaker Opened On", readonly=1, copy=False)
 
     # Business logic fields
     pricelist_id = fields.Many2one("product.pricelist", "Pricelist", default=_default_pricelist, tracking=True)
@@ -83,9 +278,12 @@ class DummyERPIntegration(models.Model):
         :param subject: Main operation title
         :param details: Long description for the log entry
         :param type: Entry type either error, warning, or info.
-        :return: None
+        :return: dummy.erp.integration.log object
         """
-        self.env["dummy.erp.integration.log"].sudo().create(
+        run = current_run()
+        if run is not None and type == "error":
+            run.failed = True
+        return self.env["dummy.erp.integration.log"].sudo().create(
             {
                 "integration_id": self.id,
                 "name": subject,
@@ -106,6 +304,45 @@ class DummyERPIntegration(models.Model):
         for rec in self:
             rec.cron_count = len(rec.cron_ids)
 
+    def _compute_job_count(self):
+        for rec in self:
+            rec.job_count = len(rec.job_ids.filtered(lambda job: job.state in ("pending", "started")))
+
+    def action_view_jobs(self):
+        action = self.env["ir.actions.actions"]._for_xml_id(
+            "connector_dummy_erp.act_window_dummy_erp_job"
+        )
+        action.update({"domain": [("integration_id", "=", self.id)]})
+        return action
+
+    def _compute_webhook_url(self):
+        base_url = self.env["ir.config_parameter"].sudo().get_param("web.base.url")
+        for rec in self:
+            rec.webhook_url = f"{base_url}/dummy_erp/webhook/{rec.id}" if rec.id else False
+
+    @api.constrains("traffic_mode", "traffic_archive_path")
+    def _check_traffic_archive_path(self):
+        if any(rec.traffic_mode != "off" and not rec.sudo().traffic_archive_path for rec in self):
+            raise ValidationError(_("A traffic archive path is required to record or replay the traffic."))
+
+    def action_generate_webhook_secret(self):
+        for rec in self:
+            rec.sudo().webhook_secret = secrets.token_hex(32)
+
+    def action_view_webhook_events(self):
+        action = self.env["ir.actions.actions"]._for_xml_id(
+            "connector_dummy_erp.act_window_dummy_erp_webhook_event"
+        )
+        action.update({"domain": [("integration_id", "=", self.id)]})
+        return action
+
+    def action_view_stats(self):
+        action = self.env["ir.actions.actions"]._for_xml_id(
+            "connector_dummy_erp.act_window_dummy_erp_integration_stats"
+        )
+        action.update({"domain": [("integration_id", "=", self.id)]})
+        return action
+
     def action_view_log(self):
         action = self.env["ir.actions.actions"]._for_xml_id(
             "connector_dummy_erp.act_window_dummy_erp_log"
@@ -128,19 +365,32 @@ class DummyERPIntegration(models.Model):
         res._create_dummy_erp_product_exporter()
         return res
 
-    # Override write to change cron active status based on integration automation fields
+    # Override write to change cron status and interval based on integration automation and scheduling fields
     def write(self, vals):
         res = super(DummyERPIntegration, self).write(vals)
-        if 'auto_import_product' in vals:
-            self.import_product_cron_id.active = vals['auto_import_product']
-        if 'auto_import_user' in vals:
-            self.import_user_cron_id.active = vals['auto_import_user']
-        if 'auto_export_cart' in vals:
-            self.export_cart_cron_id.active = vals['auto_export_cart']
-        if 'auto_export_product' in vals:
-            self.export_product_cron_id.active = vals['auto_export_product']
+        scheduling_fields = ["auto_import_product", "auto_import_user", "auto_export_cart", "auto_export_product",
+                             "scheduling_mode", "import_interval", "export_interval"]
+        if any(field in vals for field in scheduling_fields):
+            for rec in self:
+                rec._update_crons()
         return res
 
+    def _update_crons(self):
+        """
+        Activate the cron of every automated sync when the integration is scheduled with one cron per sync, and keep
+        the cron interval in line with the integration intervals.
+        :return: None
+        """
+        self.ensure_one()
+        for _method, auto_field, cron_field, _date_field, interval_field in SCHEDULED_SYNCS:
+            cron_vals = {
+                "active": self[auto_field] and self.scheduling_mode == "cron",
+                "interval_number": self[interval_field],
+            }
+            cron = self[cron_field].with_context(active_test=False)
+            if cron and (cron.active, cron.interval_number) != (cron_vals["active"], cron_vals["interval_number"]):
+                cron.write(cron_vals)
+
     # Override toggle active to deactivate/activate all automation fields based on integration status
     def toggle_active(self):
         res = super(DummyERPIntegration, self).toggle_active()
@@ -160,7 +410,7 @@ class DummyERPIntegration(models.Model):
         :return: None
         """
         try:
-            response = perform_request(self, "GET", {}, DUMMY_JSON_PATHS["test"])
+            response = perform_request(self, "GET", {}, DUMMY_JSON_PATHS["test"], check_breaker=False)
             if 200 <= response.status_code < 300 and response.json()["status"]:
                 message = _("Connection Test Successful!")
                 self.log_operation(
@@ -197,6 +447,580 @@ class DummyERPIntegration(models.Model):
                 _("An error occurred testing connection: ") + str(e)
             )
 
+    def _iter_import_batches(self, model, vals_list):
+        """
+        Helper of the bulk import: yield the given values in batches of job_chunk_size, with model in the bulk import
+        context, and flush the ORM after each batch so stored computed fields are recomputed once per batch.
+        :param model: empty record set of the imported model
+        :param vals_list: list of dicts prepared from the remote payload
+        :return: generator of (model, list of dicts) tuples
+        """
+        self.ensure_one()
+        chunk_size = self.job_chunk_size or len(vals_list) or 1
+        model = model.with_context(**BULK_IMPORT_CONTEXT)
+        for index in range(0, len(vals_list), chunk_size):
+            yield model, vals_list[index:index + chunk_size]
+            model.env.flush_all()
+
+    def _iter_export_batches(self, model, domain):
+        """
+        Stream the records to export in batches of EXPORT_BATCH_SIZE, searched by increasing id so only one batch of
+        records and payloads is in memory at a time, and records left to export by a batch are not read again. When
+        running as a job outside tests, each exported batch is committed and the ORM cache cleared before the next batch
+        is read, so a failure only loses the batch being exported.
+        :param model: product.template or sale.order model
+        :param domain: domain of the records to export
+        :return: generator of record sets
+        """
+        self.ensure_one()
+        commit = self.env.context.get("dummy_erp_job") and not is_testing()
+        last_id = 0
+        while True:
+            with sync_stage("transform"):
+                batch = model.search(domain + [("id", ">", last_id)], order="id", limit=EXPORT_BATCH_SIZE)
+            if not batch:
+                return
+            last_id = batch[-1].id
+            yield batch
+            if commit:
+                self.env.cr.commit()
+                self.env.invalidate_all()
+
+    def _fetch_remote_records(self, resource):
+        """
+        Fetch all records of a remote resource, in pages of page_size records if it is set.
+        :param resource: "products" or "users"
+        :return: list of dicts, empty if the remote ERP did not answer with records
+        """
+        self.ensure_one()
+        if not self.page_size:
+            response = perform_request(self, "GET", {}, DUMMY_JSON_PATHS[f"get_{resource}"])
+            if 200 <= response.status_code < 300 and resource in response.json():
+                return response.json()[resource]
+            return []
+        records = []
+        while True:
+            response = perform_request(
+                self, "GET", {}, DUMMY_JSON_PATHS[f"get_{resource}_page"] % (self.page_size, len(records))
+            )
+            if not 200 <= response.status_code < 300 or resource not in response.json():
+                # A partial list of records must not be imported as if it was the whole catalog
+                raise ValidationError(
+                    f"Cannot fetch {resource} from dummy ERP after {len(records)} records: {response.content}"
+                )
+            page = response.json()[resource]
+            records += page
+            if not page or len(records) >= response.json().get("total", 0):
+                return records
+
+    def _archive_remotely_deleted(self, model_name, remote_ids):
+        """
+        Archive the records imported by this integration whose remote id is not in the given set, with one query to
+        find them and one write to archive them.
+        :param model_name: "product.template" or "res.users"
+        :param remote_ids: set of all record ids in the remote ERP
+        :return: int: number of archived records
+        """
+        self.ensure_one()
+        model = self.env[model_name]
+        model.flush_model(["dummy_erp_id", "dummy_erp_integration_id", "active"])
+        self.env.cr.execute(
+            f"""
+            SELECT id FROM {model._table}
+             WHERE dummy_erp_integration_id = %s AND active
+               AND dummy_erp_id IS NOT NULL AND dummy_erp_id != 0
+               AND NOT dummy_erp_id = ANY(%s)
+            """,
+            (self.id, list(remote_ids)),
+        )
+        deleted = model.browse([row[0] for row in self.env.cr.fetchall()])
+        deleted.with_context(do_not_update_dummy_erp=True, **BULK_IMPORT_CONTEXT).write({"active": False})
+        return len(deleted)
+
+    @contextmanager
+    def _sync_run(self, job_type):
+        """
+        Measure the enclosed sync as a SyncRun and add it to the hourly statistics of the integration. A run raising an
+        exception or logging an error counts as failed. In replay mode, the run replays the traffic archive from its
+        first recorded responses. If profile_next_run is set, the run is profiled, the switch is turned off and the
+        profile is attached to the last log entry of the run (or to a new one if the run logged nothing).
+        :param job_type: name of the sync, e.g. import_dummy_products
+        :return: context manager yielding the SyncRun
+        """
+        self.ensure_one()
+        run = SyncRun(job_type, profile=self.profile_next_run and self._claim_profile_next_run())
+        last_log_id = 0
+        if run.profile:
+            last_log_id = self.env["dummy.erp.integration.log"].sudo().search(
+                [("integration_id", "=", self.id)], order="id desc", limit=1
+            ).id
+        if self.traffic_mode == "replay":
+            # Each run replays the recorded responses from the start, whatever the process replayed before
+            get_traffic_archive(self.sudo().traffic_archive_path).start_replay()
+        run.start()
+        try:
+            yield run
+        except Exception:
+            run.stop()
+            self.env["dummy.erp.integration.stats"].sudo()._record_run(self, run, True)
+            if run.profile:
+                # The transaction of the run will be rolled back, keep the profile in its own cursor
+                with self._independent_cursor() as cr:
+                    self.with_env(self.env(cr=cr))._attach_profile(run, last_log_id)
+            raise
+        else:
+            run.stop()
+            self.env["dummy.erp.integration.stats"].sudo()._record_run(self, run, run.failed)
+            if run.profile:
+                self._attach_profile(run, last_log_id)
+
+    def _attach_profile(self, run, last_log_id):
+        """
+        Attach the profile of a run to the last log entry created by the run.
+        :param run: profiled SyncRun
+        :param last_log_id: id of the last log entry of the integration before the run
+        :return: None
+        """
+        self.ensure_one()
+        log = self.env["dummy.erp.integration.log"].sudo().search(
+            [("integration_id", "=", self.id), ("id", ">", last_log_id)], order="id desc", limit=1
+        )
+        if not log:
+            log = self.log_operation(_("Profile: %s", run.job_type), "", "info")
+        log.write({
+            "details": "\n\n".join(filter(None, [log.details, run.report()])),
+            "profile_file": base64.b64encode(run.dump_stats()),
+            "profile_filename": f"{run.job_type}_{fields.Datetime.now():%Y%m%d_%H%M%S}.prof",
+        })
+
+    def _claim_profile_next_run(self):
+        """
+        Turn off profile_next_run in its own cursor, so only one run is profiled even if the run is rolled back, and
+        the run transaction never locks the integration row also updated by the circuit breaker.
+        :return: bool: True if this run turned the switch off and must be profiled
+        """
+        self.ensure_one()
+        with self._independent_cursor() as cr:
+            cr.execute(
+                "UPDATE dummy_erp_integration SET profile_next_run = false WHERE id = %s AND profile_next_run "
+                "RETURNING id",
+                (self.id,),
+            )
+            claimed = bool(cr.fetchall())
+        self.invalidate_recordset(["profile_next_run"])
+        return claimed
+
+    ################################################################
+    # Circuit breaker methods
+    ################################################################
+    def _independent_cursor(self):
+        """
+        Cursor committed right away, independently of the current transaction: what is written there is seen by every
+        worker at once and survives the rollback of a failing transaction. Tests use their own cursor instead.
+        :return: context manager of a cursor
+        """
+        if is_testing():
+            return nullcontext(self.env.cr)
+        return self.pool.cursor()
+
+    def _breaker_allow_request(self):
+        """
+        Whether a request to the remote ERP may be sent. The state is read in the current transaction, where the
+        changes made by this worker are kept up to date in the cache, and the changes of other workers are seen from
+        the next transaction. While the breaker is open, the first worker finding the probe interval elapsed switches
+        it to half open and probes the test path; all other requests are skipped.
+        :return: bool
+        """
+        self.ensure_one()
+        if self.breaker_state == "closed":
+            return True
+        with self._independent_cursor() as cr:
+            cr.execute(
+                """
+                UPDATE dummy_erp_integration
+                   SET breaker_state = 'half_open', breaker_opened_at = now() at time zone 'UTC'
+                 WHERE id = %s AND breaker_state != 'closed'
+                   AND breaker_opened_at <= now() at time zone 'UTC' - interval '1 second' * breaker_reset_interval
+                RETURNING id
+                """,
+                (self.id,),
+            )
+            probe = bool(cr.fetchall())
+        if probe:
+            self._breaker_update_cache("half_open", self.breaker_failure_count)
+        return probe and self._breaker_probe()
+
+    def _breaker_probe(self):
+        """
+        Send the test connection request, which closes the breaker on success and opens it again on failure.
+        :return: bool: True if the remote ERP answered
+        """
+        self.ensure_one()
+        try:
+            response = perform_request(self, "GET", {}, DUMMY_JSON_PATHS["test"], check_breaker=False)
+            return 200 <= response.status_code < 300
+        except Exception:
+            return False
+
+    def _breaker_record_failure(self):
+        """
+        Count a failed request, open the breaker and log it once the failure threshold is reached.
+        :return: None
+        """
+        self.ensure_one()
+        with self._independent_cursor() as cr:
+            cr.execute(
+                """
+                UPDATE dummy_erp_integration
+                   SET breaker_failure_count = breaker_failure_count + 1,
+                       breaker_state = CASE WHEN breaker_failure_count + 1 >= breaker_threshold
+                                            THEN 'open' ELSE breaker_state END,
+                       breaker_opened_at = CASE WHEN breaker_failure_count + 1 >= breaker_threshold
+                                                THEN now() at time zone 'UTC' ELSE breaker_opened_at END
+                 WHERE id = %s
+                RETURNING breaker_state, breaker_failure_count, breaker_failure_count = breaker_threshold
+                """,
+                (self.id,),
+            )
+            state, failure_count, just_opened = cr.fetchone()
+            if state == "open" and just_opened:
+                self.with_env(self.env(cr=cr)).log_operation(
+                    _("Circuit Breaker"),
+                    _("Remote ERP failed %s times in a row, requests are skipped until a connection probe succeeds.",
+                      self.breaker_threshold),
+                    "warning",
+                )
+        self._breaker_update_cache(state, failure_count)
+
+    def _breaker_record_success(self):
+        """
+        Close the breaker and reset the failure count. Nothing is written, and no cursor is opened, while the breaker is
+        closed without failures, which is the case of almost every request.
+        :return: None
+        """
+        self.ensure_one()
+        if self.breaker_state == "closed" and not self.breaker_failure_count:
+            return
+        with self._independent_cursor() as cr:
+            cr.execute(
+                """
+                UPDATE dummy_erp_integration
+                   SET breaker_state = 'closed', breaker_failure_count = 0, breaker_opened_at = NULL
+                 WHERE id = %s AND (breaker_state != 'closed' OR breaker_failure_count != 0)
+                """,
+                (self.id,),
+            )
+        self._breaker_update_cache("closed", 0)
+
+    def _breaker_update_cache(self, state, failure_count):
+        """
+        Put the breaker state written in the independent cursor in the cache of the current transaction, whose snapshot
+        may predate it.
+        :param state: breaker_state value
+        :param failure_count: breaker_failure_count value
+        :return: None
+        """
+        self.env.cache.update(self, self._fields["breaker_state"], [state])
+        self.env.cache.update(self, self._fields["breaker_failure_count"], [failure_count])
+        self.invalidate_recordset(["breaker_opened_at"])
+
+    @api.model
+    def enqueue_dummy_erp_job(self, integration_id, method_name, args=None, priority=10):
+        """
+        Enqueue a job running the given integration method in its channel. Used by the integration crons, which only
+        enqueue work while the job runner does it. A sync is not enqueued again while a previous one is still queued.
+        :param integration_id: dummy.erp.integration object id
+        :param method_name: name of the integration method, it must be a key of JOB_CHANNELS
+        :param args: list of extra arguments of the method
+        :param priority: job priority, lower values run first
+        :return: dummy.erp.job object
+        """
+        integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
+        return self.env["dummy.erp.job"].sudo().enqueue(
+            integration,
+            method_name,
+            JOB_CHANNELS[method_name],
+            args=args,
+            priority=priority,
+            identity_key=f"{integration.id}:{method_name}" if not args else None,
+        )
+
+    @api.model
+    def _cron_dispatch_integrations(self):
+        """
+        Dispatcher of the integrations scheduled with the shared dispatcher: enqueue the syncs which are due, most
+        overdue first, while at most DISPATCHER_MAX_CONCURRENCY integrations have jobs waiting or running. The next run
+        of each sync gets a random jitter so integrations with the same interval drift apart instead of polling the
+        remote ERP all at once.
+        :return: None
+        """
+        max_concurrency = int(self.env["ir.config_parameter"].sudo().get_param(
+            "connector_dummy_erp.dispatcher_max_concurrency", DISPATCHER_MAX_CONCURRENCY
+        ))
+        # Only the syncs started by the dispatcher count, with the partitions of their imports: cron scheduled
+        # integrations, login carts and webhooks do not take a slot
+        dispatched_methods = [sync[0] for sync in SCHEDULED_SYNCS] + ["import_dummy_partition"]
+        busy_integration_ids = {
+            group["integration_id"][0] for group in self.env["dummy.erp.job"].sudo().read_group([
+                ("state", "in", ("pending", "started")),
+                ("method_name", "in", dispatched_methods),
+                ("integration_id.scheduling_mode", "=", "dispatcher"),
+            ], ["integration_id"], ["integration_id"])
+        }
+        now = fields.Datetime.now()
+        due_syncs = []
+        for integration in self.search([("scheduling_mode", "=", "dispatcher")]):
+            for method_name, auto_field, _cron_field, date_field, interval_field in SCHEDULED_SYNCS:
+                if not integration[auto_field]:
+                    continue
+                interval = timedelta(minutes=integration[interval_field])
+                if not integration[date_field]:
+                    # First run of the sync: start it anywhere within its interval to stagger the integrations
+                    integration[date_field] = now + interval * random.random()
+                elif integration[date_field] <= now:
+                    due_syncs.append((integration[date_field], integration, method_name, date_field, interval))
+        for _date, integration, method_name, date_field, interval in sorted(due_syncs, key=lambda sync: sync[0]):
+            if integration.id not in busy_integration_ids and len(busy_integration_ids) >= max_concurrency:
+                continue
+            busy_integration_ids.add(integration.id)
+            self.enqueue_dummy_erp_job(integration.id, method_name)
+            integration[date_field] = now + interval * (1 + DISPATCHER_JITTER_RATIO * random.random())
+
+    ################################################################
+    # Webhook methods
+    ################################################################
+    def _check_webhook_signature(self, body, signature):
+        """
+        Check the HMAC-SHA256 signature of a webhook request body with the integration secret.
+        :param body: raw request body
+        :param signature: hexadecimal signature sent by the remote ERP, optionally prefixed with "sha256="
+        :return: bool
+        """
+        self.ensure_one()
+        secret = self.sudo().webhook_secret
+        if not secret or not signature:
+            return False
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature.removeprefix("sha256="))
+
+    def _receive_webhook_events(self, events):
+        """
+        Store the events of a webhook request in the staging table and enqueue the job applying them after
+        webhook_batch_delay, so the events received meanwhile are applied by the same job.
+        :param events: list of dicts with "resource", "action" and "data" (the remote record, at least its "id")
+        :return: dummy.erp.webhook.event record set
+        """
+        self.ensure_one()
+        event_model = self.env["dummy.erp.webhook.event"].sudo()
+        resources = dict(event_model._fields["resource"].selection)
+        actions = dict(event_model._fields["action"].selection)
+        vals_list = []
+        for event in events:
+            if not isinstance(event, dict) or not isinstance(event.get("data"), dict):
+                raise ValidationError(_("Invalid webhook event: %s", event))
+            data = event["data"]
+            if event.get("resource") not in resources or event.get("action", "upsert") not in actions \
+                    or not isinstance(data.get("id"), int):
+                raise ValidationError(_("Invalid webhook event: %s", event))
+            if event.get("action", "upsert") == "upsert":
+                self._check_webhook_payload(event["resource"], data)
+            vals_list.append({
+                "integration_id": self.id,
+                "resource": event["resource"],
+                "action": event.get("action", "upsert"),
+                "remote_id": data["id"],
+                "payload": json.dumps(data),
+            })
+        stored_events = event_model.create(vals_list)
+        self.env["dummy.erp.job"].sudo().enqueue(
+            self,
+            "apply_dummy_erp_webhook_events",
+            JOB_CHANNELS["apply_dummy_erp_webhook_events"],
+            eta=fields.Datetime.now() + timedelta(seconds=self.webhook_batch_delay),
+            identity_key=f"{self.id}:apply_dummy_erp_webhook_events",
+            # An event received while the events are being applied needs a new job
+            identity_states=("pending",),
+        )
+        return stored_events
+
+    @api.model
+    def _check_webhook_payload(self, resource, data):
+        """
+        Check that the remote record of an upsert event has all the values its importer needs, so an incomplete record
+        is rejected by the webhook instead of failing later when the events are applied.
+        :param resource: "product", "user" or "cart"
+        :param data: remote record of the event
+        :return: None
+        """
+        try:
+            if resource == "product":
+                parse_product(data)
+            elif resource == "user":
+                parse_user(data)
+            else:
+                if not isinstance(data["userId"], int):
+                    raise TypeError("userId must be an integer")
+                for item in data["products"]:
+                    missing = {"id", "price", "discountPercentage", "quantity"} - set(item)
+                    if missing:
+                        raise KeyError(", ".join(sorted(missing)))
+        except (KeyError, IndexError, TypeError) as exc:
+            raise ValidationError(
+                _("Invalid %s %s in webhook event: %s", resource, data.get("id"), repr(exc))
+            ) from exc
+
+    def _split_into_jobs(self, method_name, items):
+        """
+        When running as a job, split a large sync into jobs of job_chunk_size items which the runner can run in
+        parallel, each job calling the same method with its chunk as argument. A profiled run is never split, so its
+        profile covers the whole sync.
+        :param method_name: name of the integration method called with the chunk
+        :param items: list of JSON serializable items (remote payloads or record ids)
+        :return: bool: True if the items were enqueued as jobs and must not be processed by the caller
+        """
+        self.ensure_one()
+        chunk_size = self.job_chunk_size or len(items)
+        if not self.env.context.get("dummy_erp_job") or len(items) <= chunk_size or self._is_profiled_run():
+            return False
+        for index in range(0, len(items), chunk_size):
+            self.env["dummy.erp.job"].sudo().enqueue(
+                self, method_name, JOB_CHANNELS[method_name], args=[items[index:index + chunk_size]]
+            )
+        return True
+
+    @api.model
+    def _is_profiled_run(self):
+        """
+        Whether the sync running in the current thread is profiled, in which case it must do all its work itself:
+        chunk and partition jobs would run outside of the profile.
+        :return: bool
+        """
+        run = current_run()
+        return bool(run and run.profile)
+
+    def _has_pending_chunk_jobs(self, method_name):
+        """
+        Whether chunk jobs of a previous run of the given method are still waiting, in which case the new run is
+        skipped so the same records are not exported twice in parallel.
+        :param method_name: name of the integration method
+        :return: bool
+        """
+        self.ensure_one()
+        return bool(self.env["dummy.erp.job"].sudo().search_count([
+            ("integration_id", "=", self.id),
+            ("method_name", "=", method_name),
+            ("identity_key", "=", False),
+            ("state", "in", ("pending", "started")),
+        ]))
+
+    def _has_pending_partitions(self, resource):
+        """
+        Whether partition jobs of a previous partitioned import of the resource are still waiting or running.
+        :param resource: "products" or "users"
+        :return: bool
+        """
+        self.ensure_one()
+        jobs = self.env["dummy.erp.job"].sudo().search([
+            ("integration_id", "=", self.id),
+            ("method_name", "=", "import_dummy_partition"),
+            ("state", "in", ("pending", "started")),
+        ])
+        partition_ids = [json.loads(job.args)[0] for job in jobs]
+        return bool(partition_ids) and bool(self.env["dummy.erp.import.partition"].sudo().search_count([
+            ("id", "in", partition_ids), ("resource", "=", resource)
+        ]))
+
+    def _start_partitioned_import(self, resource):
+        """
+        Coordinator of a partitioned import: when running as a job with a partition size, ask the remote ERP for the
+        size of the catalog and enqueue one import_dummy_partition job per skip/limit range. An integration runs one
+        partitioned import of each resource at a time: none is started while partitions of the previous import of the
+        resource are still queued, and these partitions are removed when the next import starts. A profiled run
+        imports the whole catalog itself.
+        :param resource: "products" or "users"
+        :return: bool: True if the import is handled by partitions and must not be done by the caller
+        """
+        self.ensure_one()
+        if not self.partition_size or not self.env.context.get("dummy_erp_job") or self._is_profiled_run():
+            return False
+        if self._has_pending_partitions(resource):
+            return True
+        with sync_stage("fetch"):
+            response = perform_request(self, "GET", {}, DUMMY_JSON_PATHS[f"get_{resource}_page"] % (1, 0))
+        if not 200 <= response.status_code < 300 or "total" not in response.json():
+            raise ValidationError(f"Cannot fetch the number of {resource} in dummy ERP: {response.content}")
+        total = response.json()["total"]
+        if not total:
+            return True
+        partition_model = self.env["dummy.erp.import.partition"].sudo()
+        partition_model.search([("integration_id", "=", self.id), ("resource", "=", resource)]).unlink()
+        run_key = f"{self.id}:{resource}:{secrets.token_hex(8)}"
+        partitions = partition_model.create([{
+            "integration_id": self.id,
+            "resource": resource,
+            "run_key": run_key,
+            "offset": offset,
+            "limit": self.partition_size,
+        } for offset in range(0, total, self.partition_size)])
+        self.sudo().write({
+            f"{resource}_partition_run_key": run_key,
+            f"{resource}_partition_run_start": fields.Datetime.now(),
+        })
+        for partition in partitions:
+            self.env["dummy.erp.job"].sudo().enqueue(
+                self, "import_dummy_partition", JOB_CHANNELS["import_dummy_partition"], args=[partition.id]
+            )
+        return True
+
+    def _finish_partitioned_import(self, partition):
+        """
+        Once the last partition of a partitioned import is done, reconcile deletions if needed and log a single summary
+        of the import. The integration row is locked so exactly one of the partitions finishing in parallel sees the
+        import complete. Outside tests the partition is committed first and completion is checked in a read committed
+        transaction, which sees the partitions committed in the meantime by the other workers.
+        :param partition: dummy.erp.import.partition object just imported
+        :return: None
+        """
+        self.ensure_one()
+        if not is_testing():
+            self.env.cr.commit()
+            self.env.cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        resource = partition.resource
+        run_key_field, run_start_field = f"{resource}_partition_run_key", f"{resource}_partition_run_start"
+        self.flush_recordset([run_key_field])
+        # The column name comes from the resource selection of the partition, never from user input
+        self.env.cr.execute(
+            f"SELECT {run_key_field} FROM dummy_erp_integration WHERE id = %s FOR UPDATE", (self.id,)
+        )
+        if self.env.cr.fetchone()[0] != partition.run_key:
+            # Another partition already finished the import
+            return
+        partition_model = self.env["dummy.erp.import.partition"].sudo()
+        partition_model.flush_model()
+        partition_model.invalidate_model()
+        partitions = partition_model.search([("run_key", "=", partition.run_key)])
+        if any(rec.state != "done" for rec in partitions):
+            return
+        imported = sum(partitions.mapped("record_count"))
+        if self.reconcile_deletions:
+            remote_ids = {remote_id for rec in partitions for remote_id in json.loads(rec.remote_ids or "[]")}
+            with sync_stage("write"):
+                archived = self._archive_remotely_deleted(RESOURCE_MODELS[resource], remote_ids)
+            self.log_operation(
+                _("Reconcile %s", resource.capitalize()),
+                f"{archived} {resource} deleted in dummy ERP archived, {len(remote_ids)} {resource} in dummy ERP",
+                "info",
+            )
+        self.invalidate_recordset([run_key_field, run_start_field])
+        duration = (fields.Datetime.now() - self[run_start_field]).total_seconds()
+        self.sudo().write({run_key_field: False, run_start_field: False})
+        self.log_operation(
+            _("Import %s", resource.capitalize()),
+            f"{imported} {resource} imported in {len(partitions)} partitions of {partitions[0].limit} in "
+            f"{duration:.0f} seconds",
+            "info",
+        )
+
     def _create_dummy_erp_product_importer(self):
         """
         Creates a new cron job which runs import products with the id of this object.
@@ -206,12 +1030,12 @@ class DummyERPIntegration(models.Model):
             dict(
                 name=f"Dummy ERP Integration {self.name}: Import Products",
                 model_id=model_id.id,
-                interval_number=20,
+                interval_number=self.import_interval,
                 interval_type="minutes",
                 active=False,
                 numbercall=-1,
                 state="code",
-                code=f"model.import_dummy_products({self.id})",
+                code=f"model.enqueue_dummy_erp_job({self.id}, 'import_dummy_products')",
             )
         )
         self.import_product_cron_id = cron_id.id
@@ -226,12 +1050,12 @@ class DummyERPIntegration(models.Model):
             dict(
                 name=f"Dummy ERP Integration {self.name}: Import Users",
                 model_id=model_id.id,
-                interval_number=20,
+                interval_number=self.import_interval,
                 interval_type="minutes",
                 active=False,
                 numbercall=-1,
                 state="code",
-                code=f"model.import_dummy_users({self.id})",
+                code=f"model.enqueue_dummy_erp_job({self.id}, 'import_dummy_users')",
             )
         )
         self.import_user_cron_id = cron_id.id
@@ -246,12 +1070,12 @@ class DummyERPIntegration(models.Model):
             dict(
                 name=f"Dummy ERP Integration {self.name}: Export Carts",
                 model_id=model_id.id,
-                interval_number=2,
+                interval_number=self.export_interval,
                 interval_type="minutes",
                 active=False,
                 numbercall=-1,
                 state="code",
-                code=f"model.export_dummy_carts({self.id})",
+                code=f"model.enqueue_dummy_erp_job({self.id}, 'export_dummy_carts')",
             )
         )
         self.export_cart_cron_id = cron_id.id
@@ -266,12 +1090,12 @@ class DummyERPIntegration(models.Model):
             dict(
                 name=f"Dummy ERP Integration {self.name}: Export Products",
                 model_id=model_id.id,
-                interval_number=2,
+                interval_number=self.export_interval,
                 interval_type="minutes",
                 active=False,
                 numbercall=-1,
                 state="code",
-                code=f"model.export_dummy_products({self.id})",
+                code=f"model.enqueue_dummy_erp_job({self.id}, 'export_dummy_products')",
             )
         )
         self.export_product_cron_id = cron_id.id
@@ -281,33 +1105,55 @@ class DummyERPIntegration(models.Model):
     # Business Logic methods: Importers
     ##########################
     @api.model
-    def import_dummy_products(self, integration_id):
+    @sync_run_method("import_dummy_products")
+    def import_dummy_products(self, integration_id, payload=None):
         """
         Import the products from the external ERP API, raise an error if something goes wrong.
+        When running as a job, a large payload is split into chunk jobs which call this method with their chunk.
         :param integration_id: dummy.erp.integration object
+        :param payload: optional list of product payloads to import instead of fetching them
         :return: None
         """
         integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
         try:
-            response = perform_request(integration, "GET", {}, DUMMY_JSON_PATHS["get_products"])
-            if (
-                    200 <= response.status_code < 300
-                    and "products" in response.json()
-                    and len(response.json()["products"]) > 0
-            ):
-                payload = response.json()["products"]
-                self.env["product.template"].create_or_update_from_dummy_erp_payload(
-                    integration, payload
-                )
+            if payload is None:
+                if integration._start_partitioned_import("products"):
+                    return
+                with sync_stage("fetch"):
+                    payload = integration._fetch_remote_records("products")
+                if not payload:
+                    return
+                if integration.reconcile_deletions:
+                    with sync_stage("write"):
+                        archived = integration._archive_remotely_deleted(
+                            "product.template", {record["id"] for record in payload}
+                        )
+                    integration.log_operation(
+                        _("Reconcile Products"),
+                        f"{archived} products deleted in dummy ERP archived, {len(payload)} products in dummy ERP",
+                        "info",
+                    )
+                if integration._split_into_jobs("import_dummy_products", payload):
+                    return
+            self.env["product.template"].create_or_update_from_dummy_erp_payload(
+                integration, payload
+            )
+            count_records(len(payload))
+            with sync_stage("log"):
                 integration.log_operation(
                     _("Import Products"),
                     (
-                        f"Products batch imported successfully {response.json()['products']}"
+                        f"Products batch imported successfully {payload}"
                     ),
                     "info",
                 )
 
+        except CircuitOpenError:
+            # The remote ERP is known to be down, the next run will try again
+            return
         except Exception as exc:
+            if self.env.context.get("dummy_erp_job"):
+                raise
             integration.log_operation(
                 _("Import Products"),
                 (f"Exception: {str(exc)}"),
@@ -315,122 +1161,330 @@ class DummyERPIntegration(models.Model):
             )
 
     @api.model
-    def import_dummy_users(self, integration_id):
+    @sync_run_method("import_dummy_users")
+    def import_dummy_users(self, integration_id, payload=None):
         """
         Import the user from the external ERP API, raise an error if something goes wrong.
+        When running as a job, a large payload is split into chunk jobs which call this method with their chunk.
         :param integration_id: dummy.erp.integration object
+        :param payload: optional list of user payloads to import instead of fetching them
         :return: None
         """
         integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
         try:
-            response = perform_request(integration, "GET", {}, DUMMY_JSON_PATHS["get_users"])
-            if (
-                    200 <= response.status_code < 300
-                    and "users" in response.json()
-                    and len(response.json()["users"]) > 0
-            ):
-                payload = response.json()["users"]
-                self.env["res.users"].create_or_update_from_dummy_erp_payload(
-                    integration, payload
-                )
+            if payload is None:
+                if integration._start_partitioned_import("users"):
+                    return
+                with sync_stage("fetch"):
+                    payload = integration._fetch_remote_records("users")
+                if not payload:
+                    return
+                if integration.reconcile_deletions:
+                    with sync_stage("write"):
+                        archived = integration._archive_remotely_deleted(
+                            "res.users", {record["id"] for record in payload}
+                        )
+                    integration.log_operation(
+                        _("Reconcile Users"),
+                        f"{archived} users deleted in dummy ERP archived, {len(payload)} users in dummy ERP",
+                        "info",
+                    )
+                if integration._split_into_jobs("import_dummy_users", payload):
+                    return
+            self.env["res.users"].create_or_update_from_dummy_erp_payload(
+                integration, payload
+            )
+            count_records(len(payload))
+            with sync_stage("log"):
                 integration.log_operation(
                     _("Import Users"),
                     (
-                        f"Users batch imported successfully {response.json()['users']}"
+                        f"Users batch imported successfully {payload}"
                     ),
                     "info",
                 )
 
+        except CircuitOpenError:
+            # The remote ERP is known to be down, the next run will try again
+            return
         except Exception as exc:
+            if self.env.context.get("dummy_erp_job"):
+                raise
             integration.log_operation(
                 _("Import Users"),
                 (f"Exception: {str(exc)}"),
                 "error",
             )
 
+    @api.model
+    @sync_run_method("import_dummy_partition")
+    def import_dummy_partition(self, integration_id, partition_id):
+        """
+        Import one partition of a partitioned import, with its own request and in its own job, so a failed partition is
+        retried alone. The last partition to finish logs the summary of the whole import.
+        :param integration_id: dummy.erp.integration object
+        :param partition_id: dummy.erp.import.partition object id
+        :return: None
+        """
+        integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
+        partition = self.env["dummy.erp.import.partition"].sudo().browse(partition_id)
+        if partition.state != "done":
+            resource = partition.resource
+            with sync_stage("fetch"):
+                response = perform_request(
+                    integration, "GET", {},
+                    DUMMY_JSON_PATHS[f"get_{resource}_page"] % (partition.limit, partition.offset),
+                )
+            if not 200 <= response.status_code < 300 or resource not in response.json():
+                raise ValidationError(
+                    f"Cannot fetch {resource} {partition.offset} to {partition.offset + partition.limit} from dummy "
+                    f"ERP: {response.content}"
+                )
+            payload = response.json()[resource]
+            self.env[RESOURCE_MODELS[resource]].create_or_update_from_dummy_erp_payload(integration, payload)
+            count_records(len(payload))
+            partition.write({
+                "state": "done",
+                "record_count": len(payload),
+                "remote_ids": json.dumps([record["id"] for record in payload]),
+            })
+        integration._finish_partitioned_import(partition)
+
+    @api.model
+    def import_dummy_user_carts(self, integration_id, user_id):
+        """
+        Import the pending carts of a user, enqueued on login so the login itself does not wait for the remote ERP.
+        :param integration_id: dummy.erp.integration object
+        :param user_id: res.users object id
+        :return: None
+        """
+        self.env["res.users"].browse(user_id).get_dummy_erp_user_carts()
+
+    @api.model
+    @sync_run_method("apply_dummy_erp_webhook_events")
+    def apply_dummy_erp_webhook_events(self, integration_id):
+        """
+        Apply the pending webhook events of the integration in one batch through the regular import mappers. Only the
+        latest event of each remote record is applied, older ones are marked as superseded. If the batch fails, the
+        events are applied one by one and those still failing are marked as failed with their error.
+        :param integration_id: dummy.erp.integration object
+        :return: None
+        """
+        integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
+        event_model = self.env["dummy.erp.webhook.event"].sudo()
+        events = event_model.search(
+            [("integration_id", "=", integration.id), ("state", "=", "pending")], order="id", limit=WEBHOOK_BATCH_LIMIT
+        )
+        latest = {}
+        for event in events:
+            latest[(event.resource, event.remote_id)] = event
+        applied = event_model.union(*latest.values())
+        failed = event_model
+        with sync_stage("write"):
+            try:
+                with self.env.cr.savepoint():
+                    self._apply_webhook_events(integration, applied)
+            except (requests.RequestException, CircuitOpenError):
+                # The remote ERP is unreachable (images), the job is retried later
+                raise
+            except Exception:
+                # Apply the events one by one, so an event which cannot be applied does not block the others
+                for event in applied:
+                    try:
+                        with self.env.cr.savepoint():
+                            self._apply_webhook_events(integration, event)
+                    except (requests.RequestException, CircuitOpenError):
+                        raise
+                    except Exception as exc:
+                        event.write({"state": "failed", "error": str(exc)})
+                        failed |= event
+            (applied - failed).write({"state": "done"})
+            (events - applied).write({"state": "skipped"})
+        count_records(len(applied - failed))
+        with sync_stage("log"):
+            integration.log_operation(
+                _("Apply Webhook Events"),
+                f"{len(applied) - len(failed)} webhook events applied, {len(failed)} failed, "
+                f"{len(events) - len(applied)} superseded events skipped",
+                "warning" if failed else "info",
+            )
+        if len(events) == WEBHOOK_BATCH_LIMIT:
+            self.env["dummy.erp.job"].sudo().enqueue(
+                integration, "apply_dummy_erp_webhook_events", JOB_CHANNELS["apply_dummy_erp_webhook_events"]
+            )
+
+    @api.model
+    def _apply_webhook_events(self, integration, events):
+        """
+        Apply webhook events through the regular import mappers, upserts of each resource in one batch. A cart upsert
+        creates its order or replaces the lines of its draft order, a cart deletion cancels its order. Events which
+        cannot be applied, like a cart of an unknown user, raise an error.
+        :param integration: dummy.erp.integration object
+        :param events: dummy.erp.webhook.event record set, with at most one event per remote record
+        :return: None
+        """
+        upserts = {
+            resource: [json.loads(event.payload) for event in events
+                       if event.resource == resource and event.action == "upsert"]
+            for resource in ("product", "user", "cart")
+        }
+        if upserts["product"]:
+            self.env["product.template"].create_or_update_from_dummy_erp_payload(integration, upserts["product"])
+        if upserts["user"]:
+            self.env["res.users"].create_or_update_from_dummy_erp_payload(integration, upserts["user"])
+        user_ids = [cart["userId"] for cart in upserts["cart"]]
+        users = {user.dummy_erp_id: user for user in self.env["res.users"].search([("dummy_erp_id", "in", user_ids)])}
+        for cart in upserts["cart"]:
+            if cart["userId"] not in users:
+                raise UserError(_("Unknown dummy ERP user %s of cart %s", cart["userId"], cart["id"]))
+            self.env["sale.order"].sudo().update_from_dummy_erp_payload(users[cart["userId"]], integration, cart)
+        deleted_cart_ids = [event.remote_id for event in events
+                            if event.resource == "cart" and event.action == "delete"]
+        if deleted_cart_ids:
+            self.env["sale.order"].sudo().search([("dummy_erp_id", "in", deleted_cart_ids)]).cancel_from_dummy_erp()
+        for resource, model_name in (("product", "product.template"), ("user", "res.users")):
+            deleted_ids = [event.remote_id for event in events
+                           if event.resource == resource and event.action == "delete"]
+            if deleted_ids:
+                self.env[model_name].search([
+                    ("dummy_erp_integration_id", "=", integration.id), ("dummy_erp_id", "in", deleted_ids)
+                ]).with_context(do_not_update_dummy_erp=True, **BULK_IMPORT_CONTEXT).write({"active": False})
+
     ##########################
     # Business Logic methods: Exporters
     ##########################
     @api.model
-    def export_dummy_products(self, integration_id):
+    @sync_run_method("export_dummy_products")
+    def export_dummy_products(self, integration_id, product_ids=None):
         """
         Export only the updated products to the external ERP API, raise an error if something goes wrong.
+        When running as a job, the updated products are split into chunk jobs which call this method with their ids.
         :param integration_id: dummy.erp.integration object
+        :param product_ids: optional list of product.template ids to export instead of all updated products
         :return: None
         """
         integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
-        products = self.env["product.template"].get_products_to_update()
+        product_model = self.env["product.template"]
+        domain = [("update_to_dummy_erp", "=", True)]
+        if product_ids is not None:
+            domain += [("id", "in", product_ids)]
+        elif self.env.context.get("dummy_erp_job"):
+            if integration._has_pending_chunk_jobs("export_dummy_products"):
+                return
+            with sync_stage("transform"):
+                product_ids = product_model.search(domain).ids
+            if integration._split_into_jobs("export_dummy_products", product_ids):
+                return
+        exported = 0
         try:
-            for product in products:
-                payload = product
-                product_obj = payload.pop("product_obj")
-                if product_obj.dummy_erp_id:
-                    path = f"{DUMMY_JSON_PATHS['update_product']}/{product_obj.dummy_erp_id}"
-                    method = "PUT"
-                else:
-                    path = DUMMY_JSON_PATHS["add_product"]
-                    method = "POST"
-                response = perform_request(integration, method, payload, path)
-                if 200 <= response.status_code < 300 and "id" in response.json():
-                    product_obj.with_context(do_not_update_dummy_erp=True).write({
-                        "dummy_erp_id": response.json()['id'],
-                        "update_to_dummy_erp": False
-                    })
-                else:
-                    raise ValidationError(
-                        f"Cannot update product {product_obj.name} in dummy ERP"
-                    )
-            integration.log_operation(
-                _("Update products in dummy ERP"),
-                f"Products successfully updated in dummy ERP with payload: {str(products)}",
-                "info",
-            )
+            for batch in integration._iter_export_batches(product_model, domain):
+                with sync_stage("transform"):
+                    products = product_model.prepare_dummy_erp_payload(batch)
+                for payload in products:
+                    product_obj = payload.pop("product_obj")
+                    if product_obj.dummy_erp_id:
+                        path = f"{DUMMY_JSON_PATHS['update_product']}/{product_obj.dummy_erp_id}"
+                        method = "PUT"
+                    else:
+                        path = DUMMY_JSON_PATHS["add_product"]
+                        method = "POST"
+                    with sync_stage("send"):
+                        response = perform_request(integration, method, payload, path)
+                    if 200 <= response.status_code < 300 and "id" in response.json():
+                        with sync_stage("write"):
+                            product_obj.with_context(do_not_update_dummy_erp=True).write({
+                                "dummy_erp_id": response.json()['id'],
+                                "update_to_dummy_erp": False,
+                                "dummy_erp_changed_fields": False,
+                            })
+                        exported += 1
+                        count_records(1)
+                    else:
+                        raise ValidationError(
+                            f"Cannot update product {product_obj.name} in dummy ERP"
+                        )
+            with sync_stage("log"):
+                integration.log_operation(
+                    _("Update products in dummy ERP"),
+                    f"{exported} products successfully updated in dummy ERP",
+                    "info",
+                )
+        except CircuitOpenError:
+            # The remote ERP is known to be down, the next run will try again
+            return
         except Exception as exc:
+            if self.env.context.get("dummy_erp_job"):
+                raise
             integration.log_operation(
                 _("Update products in dummy ERP"),
-                (f"Exception: {str(exc)}"),
+                (f"Exception after {exported} updated products: {str(exc)}"),
                 "error",
             )
 
     @api.model
-    def export_dummy_carts(self, integration_id):
+    @sync_run_method("export_dummy_carts")
+    def export_dummy_carts(self, integration_id, cart_ids=None):
         """
         Import only the updated carts to the external ERP API, raise an error if something goes wrong.
+        When running as a job, the updated carts are split into chunk jobs which call this method with their ids.
         :param integration_id: dummy.erp.integration object
+        :param cart_ids: optional list of sale.order ids to export instead of all updated carts
         :return: None
         """
         integration = self.with_context(active_test=False).search([("id", "=", integration_id)])
-        carts = self.env["sale.order"].get_carts_to_update()
+        cart_model = self.env["sale.order"]
+        domain = cart_model._get_carts_to_update_domain(integration)
+        if cart_ids is not None:
+            # Carts edited again since the chunk was planned wait for their quiet period like the others
+            domain = [("id", "in", cart_ids)] + domain
+        elif self.env.context.get("dummy_erp_job"):
+            if integration._has_pending_chunk_jobs("export_dummy_carts"):
+                return
+            with sync_stage("transform"):
+                cart_ids = cart_model.search(domain).ids
+            if integration._split_into_jobs("export_dummy_carts", cart_ids):
+                return
+        exported = 0
         try:
-            for cart in carts:
-                payload = cart
-                cart_obj = payload.pop("cart_obj")
-                if cart_obj.dummy_erp_id:
-                    path = f"{DUMMY_JSON_PATHS['update_cart']}/{cart_obj.dummy_erp_id}"
-                    method = "PUT"
-                    payload.pop("userId")
-                else:
-                    path = DUMMY_JSON_PATHS["add_cart"]
-                    method = "POST"
-                payload.pop("id")
-                response = perform_request(integration, method, payload, path)
-                if 200 <= response.status_code < 300 and "id" in response.json():
-                    cart_obj.with_context(do_not_update_dummy_erp=True).write({
-                        "dummy_erp_id": response.json()['id'],
-                        "update_to_dummy_erp": False
-                    })
-                else:
-                    raise ValidationError(
-                        f"Cannot update cart {cart_obj.name} in dummy ERP: {response.content}"
-                    )
-            integration.log_operation(
-                _("Update carts in dummy ERP"),
-                f"Carts successfully updated in dummy ERP with payload: {str(carts)}",
-                "info",
-            )
+            for batch in integration._iter_export_batches(cart_model, domain):
+                with sync_stage("transform"):
+                    carts = cart_model.prepare_dummy_erp_payload(batch)
+                for payload in carts:
+                    cart_obj = payload.pop("cart_obj")
+                    sync_version = payload.pop("sync_version")
+                    if cart_obj.dummy_erp_id:
+                        path = f"{DUMMY_JSON_PATHS['update_cart']}/{cart_obj.dummy_erp_id}"
+                        method = "PUT"
+                        payload.pop("userId")
+                    else:
+                        path = DUMMY_JSON_PATHS["add_cart"]
+                        method = "POST"
+                    payload.pop("id")
+                    with sync_stage("send"):
+                        response = perform_request(integration, method, payload, path)
+                    if 200 <= response.status_code < 300 and "id" in response.json():
+                        with sync_stage("write"):
+                            cart_obj._mark_dummy_erp_exported(response.json()['id'], sync_version)
+                        exported += 1
+                        count_records(1)
+                    else:
+                        raise ValidationError(
+                            f"Cannot update cart {cart_obj.name} in dummy ERP: {response.content}"
+                        )
+            with sync_stage("log"):
+                integration.log_operation(
+                    _("Update carts in dummy ERP"),
+                    f"{exported} carts successfully updated in dummy ERP",
+                    "info",
+                )
+        except CircuitOpenError:
+            # The remote ERP is known to be down, the next run will try again
+            return
         except Exception as exc:
+            if self.env.context.get("dummy_erp_job"):
+                raise
             integration.log_operation(
                 _("Update carts in dummy ERP"),
-                (f"Exception: {str(exc)}"),
+                (f"Exception after {exported} updated carts: {str(exc)}"),
                 "error",
             )
@@ -20,3 +20,5 @@ class DummyERPIntegrationLog(models.Model):
         [("info", "Info"), ("warning", "Warning"), ("error", "Error")]
     )
     company_id = fields.Many2one(related="integration_id.company_id", store=1)
+    profile_file = fields.Binary("Profile", attachment=True)
+    profile_filename = fields.Char("Profile File Name")
@@ -0,0 +1,64 @@
+from odoo import api, models, fields
+
+from .dummy_erp_job import is_testing
+
+
+class DummyERPIntegrationStats(models.Model):
+    _name = 'dummy.erp.integration.stats'
+    _description = 'Dummy ERP Integration Statistics'
+    _order = "hour desc, job_type"
+    _log_access = False
+
+    """
+    Hourly totals of the sync runs of each integration and job type, updated at the end of every run so dashboards do
+    not have to scan and parse the integration log.
+    """
+
+    integration_id = fields.Many2one(
+        "dummy.erp.integration", "Dummy ERP Integration", required=1, ondelete="cascade", index=True
+    )
+    job_type = fields.Char("Job Type", required=1)
+    hour = fields.Datetime("Hour", required=1)
+    run_count = fields.Integer("Runs", group_operator="sum")
+    failure_count = fields.Integer("Failures", group_operator="sum")
+    record_count = fields.Integer("Records", group_operator="sum")
+    duration = fields.Float("Duration (seconds)", group_operator="sum")
+    http_call_count = fields.Integer("HTTP Calls", group_operator="sum")
+    company_id = fields.Many2one(related="integration_id.company_id", store=1)
+
+    _sql_constraints = [
+        ("integration_job_type_hour_uniq", "unique(integration_id, job_type, hour)",
+         "Statistics are aggregated once per integration, job type and hour!"),
+    ]
+
+    @api.model
+    def _record_run(self, integration, run, failed):
+        """
+        Add a finished run to the statistics of its hour with a single upsert, in a cursor committed right away so the
+        row lock is released at once and the statistics of failed runs survive their rollback.
+        :param integration: dummy.erp.integration object
+        :param run: stopped SyncRun
+        :param failed: whether the run failed
+        :return: None
+        """
+        with integration._independent_cursor() as cr:
+            if not is_testing():
+                # Parallel runs upsert the same row: wait for each other instead of failing to serialize
+                cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute(
+                """
+                INSERT INTO dummy_erp_integration_stats
+                       (integration_id, company_id, job_type, hour,
+                        run_count, failure_count, record_count, duration, http_call_count)
+                SELECT id, company_id, %s, date_trunc('hour', now() at time zone 'UTC'), 1, %s, %s, %s, %s
+                  FROM dummy_erp_integration WHERE id = %s
+                ON CONFLICT (integration_id, job_type, hour) DO UPDATE
+                   SET run_count = dummy_erp_integration_stats.run_count + 1,
+                       failure_count = dummy_erp_integration_stats.failure_count + excluded.failure_count,
+                       record_count = dummy_erp_integration_stats.record_count + excluded.record_count,
+                       duration = dummy_erp_integration_stats.duration + excluded.duration,
+                       http_call_count = dummy_erp_integration_stats.http_call_count + excluded.http_call_count
+                """,
+                (run.job_type, int(failed), run.record_count, run.duration, run.http_call_count, integration.id),
+            )
+        self.invalidate_model()
@@ -0,0 +1,299 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import odoo
+from odoo import api, fields, models, SUPERUSER_ID, _
+
+_logger = logging.getLogger(__name__)
+
+# Maximum time (in seconds) a single runner call keeps claiming new jobs before giving the cron thread back
+RUNNER_MAX_DURATION = 300
+# Maximum time (in seconds) the runner waits for a running job to finish before looking for new jobs
+RUNNER_POLL_INTERVAL = 5
+# Running jobs hold a session advisory lock (JOB_LOCK_NAMESPACE, job id) on their connection. Jobs "started" for
+# longer than STALE_JOB_GRACE seconds without that lock are lost (killed worker) and re-queued
+JOB_LOCK_NAMESPACE = 0x44455250
+STALE_JOB_GRACE = 60
+
+
+def is_testing():
+    """
+    Whether the current thread runs inside the Odoo test suite, in which case jobs must run sequentially in the test
+    cursor instead of committing in their own cursors.
+    :return: bool
+    """
+    return getattr(threading.current_thread(), "testing", False)
+
+
+class DummyERPJobChannel(models.Model):
+    _name = 'dummy.erp.job.channel'
+    _description = 'Dummy ERP Job Channel'
+    _order = "sequence, id"
+
+    """
+    A channel groups integration jobs of the same kind and limits how many of them may run at the same time, so a long
+    running import cannot starve exports or carts imported on login.
+    """
+
+    name = fields.Char("Name", required=1)
+    code = fields.Char("Code", required=1)
+    sequence = fields.Integer(default=10)
+    capacity = fields.Integer("Capacity", default=1, help="Maximum number of jobs of this channel running in parallel")
+    retry_delay = fields.Integer("Retry Delay (seconds)", default=30,
+                                 help="Base delay of the exponential backoff applied to failed jobs")
+    max_retries = fields.Integer("Max Retries", default=5)
+
+    _sql_constraints = [
+        ("code_uniq", "unique(code)", "The channel code must be unique!"),
+    ]
+
+
+class DummyERPJob(models.Model):
+    _name = 'dummy.erp.job'
+    _description = 'Dummy ERP Job'
+    _order = "priority, eta, id"
+
+    """
+    A unit of work of the integration: the name of a dummy.erp.integration method and its arguments. Jobs are executed
+    by the job runner cron in their own cursor, with one thread per job and at most "capacity" jobs per channel.
+    """
+
+    name = fields.Char("Description", required=1)
+    integration_id = fields.Many2one(
+        "dummy.erp.integration", "Dummy ERP Integration", required=1, ondelete="cascade"
+    )
+    channel_id = fields.Many2one("dummy.erp.job.channel", "Channel", required=1, ondelete="restrict")
+    method_name = fields.Char("Method", required=1)
+    args = fields.Text("Arguments", default="[]")
+    identity_key = fields.Char("Identity Key", index=True,
+                               help="Jobs sharing the same key are not enqueued twice while one is still pending")
+    priority = fields.Integer("Priority", default=10)
+    state = fields.Selection(
+        [("pending", "Pending"), ("started", "Started"), ("done", "Done"), ("failed", "Failed")],
+        default="pending", required=1, index=True
+    )
+    attempt = fields.Integer("Attempt", default=0)
+    max_retries = fields.Integer("Max Retries", default=5)
+    eta = fields.Datetime("Execute After")
+    date_started = fields.Datetime("Started On")
+    date_done = fields.Datetime("Done On")
+    exc_info = fields.Text("Exception")
+    company_id = fields.Many2one(related="integration_id.company_id", store=1)
+
+    ##################
+    # Queue methods
+    ##################
+    @api.model
+    def enqueue(self, integration, method_name, channel_code, args=None, priority=10, eta=None, identity_key=None,
+                identity_states=("pending", "started")):
+        """
+        Create a pending job, unless a job with the same identity key is still in one of the identity states.
+        :param integration: dummy.erp.integration object
+        :param method_name: name of the dummy.erp.integration method to call, it receives the integration id first
+        :param channel_code: code of the dummy.erp.job.channel used to run the job
+        :param args: list of JSON serializable extra arguments passed to the method
+        :param priority: lower values run first
+        :param eta: datetime before which the job must not run
+        :param identity_key: optional deduplication key
+        :param identity_states: states of the jobs the new job is deduplicated against
+        :return: dummy.erp.job object (empty if the job was deduplicated)
+        """
+        if identity_key and self.search_count([("identity_key", "=", identity_key),
+                                               ("state", "in", list(identity_states))]):
+            return self.browse()
+        channel = self.env["dummy.erp.job.channel"].search([("code", "=", channel_code)], limit=1)
+        job = self.create({
+            "name": f"{integration.name}: {method_name}",
+            "integration_id": integration.id,
+            "channel_id": channel.id,
+            "method_name": method_name,
+            "args": json.dumps(args or []),
+            "priority": priority,
+            "eta": eta,
+            "identity_key": identity_key,
+            "max_retries": channel.max_retries,
+        })
+        runner = self.env.ref("connector_dummy_erp.ir_cron_dummy_erp_job_runner", raise_if_not_found=False)
+        if runner:
+            runner._trigger(eta)
+        return job
+
+    def action_requeue(self):
+        self.write({"state": "pending", "attempt": 0, "eta": False, "exc_info": False})
+
+    def action_cancel(self):
+        self.filtered(lambda job: job.state == "pending").write({"state": "failed", "exc_info": _("Cancelled")})
+
+    ##################
+    # Runner methods
+    ##################
+    def _claim(self, channel, limit):
+        """
+        Lock and mark as started the next pending jobs of the channel. Rows locked by another runner are skipped.
+        :param channel: dummy.erp.job.channel object
+        :param limit: maximum number of jobs to claim
+        :return: dummy.erp.job record set of the claimed jobs
+        """
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            UPDATE dummy_erp_job
+               SET state = 'started', attempt = attempt + 1, date_started = now() at time zone 'UTC'
+             WHERE id IN (
+                SELECT id FROM dummy_erp_job
+                 WHERE state = 'pending' AND channel_id = %s
+                   AND (eta IS NULL OR eta <= now() at time zone 'UTC')
+                 ORDER BY priority, eta NULLS FIRST, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+             )
+            RETURNING id
+            """,
+            (channel.id, limit),
+        )
+        job_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(["state", "attempt", "date_started"])
+        return self.browse(job_ids)
+
+    def _requeue_stale_jobs(self):
+        """
+        Re-queue the started jobs which no longer run: their advisory lock was released when the connection of their
+        worker was closed. Jobs running for hours keep their lock and are never started twice.
+        :return: None
+        """
+        self.flush_model(["state", "date_started"])
+        self.env.cr.execute(
+            """
+            SELECT job.id FROM dummy_erp_job job
+             WHERE job.state = 'started' AND job.date_started < %s
+               AND NOT EXISTS (
+                   SELECT 1 FROM pg_locks pl
+                    WHERE pl.locktype = 'advisory'
+                      AND pl.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+                      AND pl.classid = %s AND pl.objid = job.id AND pl.objsubid = 2
+               )
+            """,
+            (fields.Datetime.now() - timedelta(seconds=STALE_JOB_GRACE), JOB_LOCK_NAMESPACE),
+        )
+        stale_jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+        stale_jobs.write({"state": "pending", "exc_info": _("Re-queued after the runner lost the job")})
+
+    @api.model
+    def _cron_run_jobs(self):
+        """
+        Job runner, called by its own cron: claim as many jobs as every channel has free capacity for and run each of
+        them in a thread of a pool kept for the whole call, with its own cursor. The runner does not wait for the jobs
+        it started: it claims again as soon as a job finishes or every RUNNER_POLL_INTERVAL seconds, so a long job only
+        takes one slot of its channel while the other channels keep running. Once the time budget is spent, the runner
+        returns without waiting for the running jobs, which the next call counts against the channel capacities.
+
+        All job threads run in the cron worker process and share its interpreter lock: the runner parallelizes waiting
+        on the remote ERP and on the database, not Python CPU work, so CPU-bound jobs (large chunk or partition imports)
+        do not use more than one core together.
+        """
+        self._requeue_stale_jobs()
+        started_at = time.time()
+        channels = self.env["dummy.erp.job.channel"].search([])
+        dbname = self.env.cr.dbname
+        executor = ThreadPoolExecutor(max_workers=max(sum(channels.mapped("capacity")), 1))
+        running = set()
+        try:
+            while time.time() - started_at < RUNNER_MAX_DURATION:
+                if not is_testing():
+                    # Start a new transaction to see the jobs finished or enqueued by other cursors meanwhile
+                    self.env.cr.commit()
+                claimed = self.browse()
+                for channel in channels:
+                    started = self.search_count([("channel_id", "=", channel.id), ("state", "=", "started")])
+                    if channel.capacity - started > 0:
+                        claimed |= self._claim(channel, channel.capacity - started)
+                if is_testing():
+                    if not claimed:
+                        break
+                    for job in claimed:
+                        job._perform()
+                    continue
+                if claimed:
+                    # Claims must be visible to the job cursors before they start
+                    self.env.cr.commit()
+                    running |= {executor.submit(self._run_job_in_new_cursor, dbname, job_id) for job_id in claimed.ids}
+                elif not running:
+                    break
+                _done, running = wait(running, timeout=RUNNER_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        finally:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _run_job_in_new_cursor(dbname, job_id):
+        threading.current_thread().dbname = dbname
+        try:
+            with odoo.registry(dbname).cursor() as cr:
+                # A session lock survives the commits of the job, and is released if the worker dies
+                cr.execute("SELECT pg_try_advisory_lock(%s, %s)", (JOB_LOCK_NAMESPACE, job_id))
+                if not cr.fetchone()[0]:
+                    _logger.warning("Dummy ERP job %s is already running", job_id)
+                    return
+                try:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    env["dummy.erp.job"].browse(job_id)._perform()
+                finally:
+                    # The connection goes back to the pool, it must not keep the lock
+                    cr.rollback()
+                    cr.execute("SELECT pg_advisory_unlock(%s, %s)", (JOB_LOCK_NAMESPACE, job_id))
+        except Exception:
+            _logger.exception("Dummy ERP job %s crashed", job_id)
+
+    def _perform(self):
+        """
+        Run the job method. On success the job is done, on failure it is re-queued with an exponential backoff until
+        its retries are exhausted. Outside tests the job cursor is committed so each job is its own transaction.
+        :return: None
+        """
+        self.ensure_one()
+        env = self.env(context=dict(self.env.context, dummy_erp_job=self.id))
+        method = getattr(env["dummy.erp.integration"], self.method_name)
+        integration_id = self.integration_id.id
+        args = json.loads(self.args or "[]")
+        try:
+            if is_testing():
+                with self.env.cr.savepoint():
+                    method(integration_id, *args)
+            else:
+                method(integration_id, *args)
+                self.env.cr.commit()
+        except Exception as exc:
+            if not is_testing():
+                self.env.cr.rollback()
+            self._handle_failure(exc, traceback.format_exc())
+        else:
+            self.write({"state": "done", "date_done": fields.Datetime.now()})
+        if not is_testing():
+            self.env.cr.commit()
+
+    def _handle_failure(self, exc, exc_info):
+        """
+        Re-queue the job with an exponential backoff, or mark it failed and log the error once retries are exhausted.
+        :param exc: the raised exception
+        :param exc_info: formatted traceback
+        :return: None
+        """
+        self.ensure_one()
+        if self.attempt < self.max_retries:
+            delay = self.channel_id.retry_delay * 2 ** (self.attempt - 1)
+            self.write({
+                "state": "pending",
+                "eta": fields.Datetime.now() + timedelta(seconds=delay),
+                "exc_info": exc_info,
+            })
+        else:
+            self.write({"state": "failed", "date_done": fields.Datetime.now(), "exc_info": exc_info})
+            self.integration_id.log_operation(
+                self.name,
+                f"Exception: {str(exc)}",
+                "error",
+            )
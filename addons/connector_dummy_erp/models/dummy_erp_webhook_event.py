@@ -0,0 +1,28 @@
+from odoo import models, fields
+
+
+class DummyERPWebhookEvent(models.Model):
+    _name = 'dummy.erp.webhook.event'
+    _description = 'Dummy ERP Webhook Event'
+    _order = "id desc"
+
+    """
+    Staging table of the change events pushed by the remote ERP. Events are stored as soon as they are received and
+    applied in batches by the apply_dummy_erp_webhook_events job of their integration.
+    """
+
+    integration_id = fields.Many2one(
+        "dummy.erp.integration", "Dummy ERP Integration", required=1, ondelete="cascade"
+    )
+    resource = fields.Selection(
+        [("product", "Product"), ("user", "User"), ("cart", "Cart")], required=1
+    )
+    action = fields.Selection([("upsert", "Created/Updated"), ("delete", "Deleted")], required=1, default="upsert")
+    remote_id = fields.Integer("ID In Dummy ERP", required=1)
+    payload = fields.Text("Payload")
+    state = fields.Selection(
+        [("pending", "Pending"), ("done", "Applied"), ("skipped", "Superseded"), ("failed", "Failed")],
+        default="pending", required=1, index=True
+    )
+    company_id = fields.Many2one(related="integration_id.company_id", store=1)
+    error = fields.Text("Error", readonly=1)
@@ -0,0 +1,118 @@
+import base64
+import hashlib
+import os
+
+from odoo.tools import config, image_process
+
+from .api_client import fetch_url
+
+# Default size of the remote image cache of each database, it can be changed with the
+# "connector_dummy_erp.image_cache_max_mb" system parameter
+IMAGE_CACHE_MAX_MB = 256
+
+
+class RemoteImageCache:
+    """
+    Bounded least recently used disk cache of remote images, keyed by their URL. The modification time of a cached file
+    is its last access time, and the least recently accessed files are removed when the cache exceeds its size.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest())
+
+    def get(self, url):
+        """
+        Return the cached image of the URL and mark it as recently used.
+        :param url: remote image URL
+        :return: bytes or None if the image is not cached
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as image_file:
+                data = image_file.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, url, data):
+        """
+        Store the image of the URL, then evict the least recently used images exceeding the cache size.
+        :param url: remote image URL
+        :param data: image bytes
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url)
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as image_file:
+            image_file.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def discard(self, url):
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def get_image_cache(env):
+    """
+    Return the remote image cache of the database of the environment.
+    :param env: odoo environment
+    :return: RemoteImageCache
+    """
+    max_mb = int(env["ir.config_parameter"].sudo().get_param(
+        "connector_dummy_erp.image_cache_max_mb", IMAGE_CACHE_MAX_MB
+    ))
+    directory = os.path.join(config["data_dir"], "dummy_erp_image_cache", env.cr.dbname)
+    return RemoteImageCache(directory, max_mb * 1024 * 1024)
+
+
+def get_lazy_image(record, field_name):
+    """
+    Return the image of a record imported without its image. The first access downloads the remote image into the
+    cache and serves it from there; an image accessed again is promoted to image_1920 so Odoo stores it and computes
+    its resized versions, and it is removed from the cache. Downloads failing or not returning an image raise and are
+    not cached.
+    :param record: product.template or res.users object with a dummy_erp_image_url
+    :param field_name: requested image field, e.g. image_1920, image_128 or avatar_128
+    :return: bytes: image data resized for the requested field
+    """
+    cache = get_image_cache(record.env)
+    url = record.dummy_erp_image_url
+    size = int(field_name.split("_")[-1]) if field_name.split("_")[-1].isdigit() else 1920
+    data = cache.get(url)
+    if data is None:
+        data = fetch_url(record.sudo().dummy_erp_integration_id, url)
+        image = image_process(data, size=(size, size))
+        cache.put(url, data)
+        return image
+    record.sudo().with_context(
+        do_not_update_dummy_erp=True, tracking_disable=True
+    ).write({"image_1920": base64.b64encode(data)})
+    cache.discard(url)
+    return image_process(data, size=(size, size))
@@ -1,8 +1,38 @@
 import base64
-import requests
+from collections import defaultdict
 
 from odoo import models, fields, api
 
+from .api_client import fetch_url
+from .sync_run import sync_stage
+from .transform import parse_product, product_vals, transform_payload, TransformLookups
+
+# Product fields synced to the remote Dummy ERP, with the payload keys they are exported to
+DUMMY_ERP_FIELDS = {
+    "name": ["title"],
+    "description_sale": ["description"],
+    "list_price": ["price"],
+    "discount_percentage": ["discountPercentage"],
+    "dummy_erp_rating": ["rating"],
+    "dummy_erp_stock": ["stock"],
+    "dummy_erp_brand": ["brand"],
+    "categ_id": ["category"],
+    "image_1920": ["thumbnail", "images"],
+}
+
+# Plain columns of product_template which the SQL fast path may update, with their SQL type. No stored computed field
+# may depend on them since the fast path bypasses the ORM recomputation.
+FAST_PATH_COLUMNS = {
+    "list_price": "numeric",
+    "dummy_erp_rating": "float8",
+    "dummy_erp_brand": "varchar",
+    "dummy_erp_stock": "float8",
+}
+# Fields of the import dictionaries which are not compared to decide whether the fast path applies
+FAST_PATH_IGNORED_FIELDS = ["id", "dummy_erp_id", "update_to_dummy_erp", "image_1920"]
+# Number of rows updated by a single UPDATE statement of the fast path
+FAST_PATH_BATCH_SIZE = 1000
+
 
 class ProductTemplate(models.Model):
     _inherit = "product.template"
@@ -20,20 +50,39 @@ class ProductTemplate(models.Model):
     dummy_erp_rating = fields.Float("Dummy ERP Rating")
     discount_percentage = fields.Float("Discount Percentage")
     dummy_erp_stock = fields.Float("Dummy ERP Stock")
+    dummy_erp_image_url = fields.Char("Dummy ERP Image URL")
 
     # Indicating whether this product should be updated in the dummy ERP. By default, created products should be synced.
     update_to_dummy_erp = fields.Boolean(default=True)
+    # Comma separated DUMMY_ERP_FIELDS changed since the last export, only these are sent when updating the product
+    dummy_erp_changed_fields = fields.Char(copy=False)
 
-    # Override write function to mark record as update_to_dummy_erp if a relevant field was updated
+    # Override write function to mark record as update_to_dummy_erp, with the changed fields, if a relevant field was
+    # updated. The flag is set in the same write as the other values.
     def write(self, vals):
-        dummy_erp_fields = ["image_1920", "name", "description_sale", "list_price", "discount_percentage",
-                            "dummy_erp_rating", "dummy_erp_brand", "product_categ_id", "dummy_erp_stock"]
         dummy_erp_updated_fields = [vals_field for
-                                    vals_field in vals if vals_field in dummy_erp_fields]
-        res = super(ProductTemplate, self).write(vals)
-        if len(dummy_erp_updated_fields) > 0 and not self.env.context.get('do_not_update_dummy_erp', False):
-            self.update_to_dummy_erp = True
-        return res
+                                    vals_field in vals if vals_field in DUMMY_ERP_FIELDS]
+        if not dummy_erp_updated_fields or self.env.context.get('do_not_update_dummy_erp', False):
+            return self._write_dummy_erp_image_url(vals)
+        # Records with the same already changed fields are written together
+        records_by_changed_fields = defaultdict(lambda: self.browse())
+        for rec in self:
+            records_by_changed_fields[rec.dummy_erp_changed_fields or ""] |= rec
+        for changed_fields, records in records_by_changed_fields.items():
+            changed_fields = set(filter(None, changed_fields.split(","))) | set(dummy_erp_updated_fields)
+            records._write_dummy_erp_image_url(dict(
+                vals, update_to_dummy_erp=True, dummy_erp_changed_fields=",".join(sorted(changed_fields))
+            ))
+        return True
+
+    def _write_dummy_erp_image_url(self, vals):
+        if "dummy_erp_image_url" in vals and "image_1920" not in vals:
+            # The remote image changed: drop the stored image so the new one is fetched when displayed
+            image_changed = self.filtered(lambda rec: rec.dummy_erp_image_url != vals["dummy_erp_image_url"])
+            res = super(ProductTemplate, self - image_changed).write(vals)
+            super(ProductTemplate, image_changed).write(dict(vals, image_1920=False))
+            return res
+        return super(ProductTemplate, self).write(vals)
 
     @api.model
     def get_products_to_update(self):
@@ -68,17 +117,34 @@ class ProductTemplate(models.Model):
         else:
             return categ_object.create({"name": categ_name}).id
 
+    @api.model
+    def _get_category_ids_by_name(self, categ_names):
+        """
+        Batch variant of get_category_by_name: one search for all the names and one creation for the missing ones.
+        :param categ_names: set of product category names
+        :return: dict mapping each name to its product category id
+        """
+        categ_object = self.env["product.category"]
+        category_ids = {}
+        for category in categ_object.search([("name", "in", list(categ_names))]):
+            category_ids.setdefault(category.name, category.id)
+        missing = [name for name in categ_names if name not in category_ids]
+        for category in categ_object.create([{"name": name} for name in missing]):
+            category_ids[category.name] = category.id
+        return category_ids
+
     @api.model
     def prepare_dummy_erp_payload(self, recs):
         """
-        Prepare the payload for the remote Dummy ERP
+        Prepare the payload for the remote Dummy ERP. Products already in the Dummy ERP only get the values of their
+        changed fields, new products get all values.
         :param recs: record set containing products to prepare payload from
         :return: List of dictionaries containing product payloads
         """
         payload = []
         base_url = self.get_base_url()
         for rec in recs:
-            payload.append({
+            product_payload = {
                 "product_obj": rec,
                 "title": rec.name,
                 "description": rec.description_sale or "",
@@ -96,7 +162,13 @@ class ProductTemplate(models.Model):
                     base_url + f'/web/image/product.template/{rec.id}/image_1024',
                     base_url + f'/web/image/product.template/{rec.id}/image_1920'
                 ]
-            })
+            }
+            if rec.dummy_erp_id and rec.dummy_erp_changed_fields:
+                changed_keys = {key for fname in rec.dummy_erp_changed_fields.split(",")
+                                for key in DUMMY_ERP_FIELDS.get(fname, [])}
+                product_payload = {key: value for key, value in product_payload.items()
+                                   if key == "product_obj" or key in changed_keys}
+            payload.append(product_payload)
         return payload
 
     @api.model
@@ -108,50 +180,154 @@ class ProductTemplate(models.Model):
         :param payload: list of dicts imported from the remote Dummy ERP
         :return: None
         """
-        products = self.prepare_dicts_from_dummy_erp_payload(integration_id, payload)
+        with sync_stage("transform"):
+            products = self.prepare_dicts_from_dummy_erp_payload(integration_id, payload)
+        with sync_stage("write"):
+            if integration_id.sql_fast_path:
+                products = self._fast_update_from_dummy_erp_dicts(products)
+            if integration_id.bulk_import:
+                self._bulk_create_or_update_from_dummy_erp_dicts(integration_id, products)
+                return
+            for product_dict in products:
+                if product_dict["id"]:
+                    product_obj = self.with_context(active_test=False).search([
+                        ("dummy_erp_integration_id", "=", integration_id.id),
+                        ("dummy_erp_id", "=", product_dict["id"]),
+                    ], limit=1)
+                    product_dict.pop('id')
+                    if product_obj:
+                        product_obj.with_context(do_not_update_dummy_erp=True).write(product_dict)
+                    else:
+                        self.create(product_dict)
+
+    @api.model
+    def _fast_update_from_dummy_erp_dicts(self, products):
+        """
+        SQL fast path of the import: existing products of which only FAST_PATH_COLUMNS changed are updated with single
+        UPDATE ... FROM (VALUES ...) statements, bypassing the write override and the generic ORM machinery, and
+        products without any change are skipped. The image is considered unchanged when its remote URL is.
+        update_to_dummy_erp is left alone, like on the regular import path.
+        :param products: list of dicts returned by prepare_dicts_from_dummy_erp_payload
+        :return: list of the dicts which still need the regular ORM path (new products, relational or other changes)
+        """
+        existing = {
+            product.dummy_erp_id: product
+            for product in self.with_context(active_test=False).search([
+                ("dummy_erp_integration_id", "in", list({vals["dummy_erp_integration_id"] for vals in products})),
+                ("dummy_erp_id", "in", [vals["id"] for vals in products if vals["id"]]),
+            ])
+        }
+        remaining = []
+        rows = []
         for product_dict in products:
-            if product_dict["id"]:
-                product_obj = self.search(
-                    [("dummy_erp_id", "=", product_dict["id"])], limit=1
-                )
-                product_dict.pop('id')
-                if product_obj:
-                    product_obj.with_context(do_not_update_dummy_erp=True).write(product_dict)
+            product = existing.get(product_dict["id"])
+            compared_fields = [fname for fname in product_dict
+                               if fname not in FAST_PATH_COLUMNS and fname not in FAST_PATH_IGNORED_FIELDS]
+            if not product or product.dummy_erp_image_url != product_dict.get("dummy_erp_image_url") or any(
+                    product._dummy_erp_value_changed(fname, product_dict[fname]) for fname in compared_fields
+            ):
+                remaining.append(product_dict)
+            elif any(product._dummy_erp_value_changed(fname, product_dict[fname]) for fname in FAST_PATH_COLUMNS):
+                rows.append([product.id] + [product_dict[fname] for fname in FAST_PATH_COLUMNS])
+        if rows:
+            self._fast_update_columns(rows)
+        return remaining
+
+    def _dummy_erp_value_changed(self, fname, value):
+        """
+        Compare the current value of a field with a value of an import dictionary.
+        :param fname: field name
+        :param value: value in the format of create/write
+        :return: bool
+        """
+        self.ensure_one()
+        field = self._fields[fname]
+        if field.type == "many2one":
+            return self[fname].id != (value or False)
+        if field.type in ("many2many", "one2many"):
+            return set(self[fname].ids) != set(value or [])
+        if field.type in ("float", "monetary"):
+            return float(self[fname] or 0.0) != float(value or 0.0)
+        return (self[fname] or False) != (value or False)
+
+    @api.model
+    def _fast_update_columns(self, rows):
+        """
+        Update FAST_PATH_COLUMNS of product_template with one UPDATE ... FROM (VALUES ...) per batch of rows and
+        invalidate the ORM cache. The whole cache is invalidated: variants keep their own cache of the inherited
+        columns and of the fields computed from them, like lst_price.
+        :param rows: list of [product template id, *values of FAST_PATH_COLUMNS]
+        :return: None
+        """
+        # Pending ORM writes of these columns must reach the database before they are overwritten
+        self.flush_model(list(FAST_PATH_COLUMNS))
+        columns = list(FAST_PATH_COLUMNS)
+        row_template = "(%s::int, " + ", ".join(f"%s::{sql_type}" for sql_type in FAST_PATH_COLUMNS.values()) + ")"
+        for index in range(0, len(rows), FAST_PATH_BATCH_SIZE):
+            batch = rows[index:index + FAST_PATH_BATCH_SIZE]
+            query = f"""
+                UPDATE product_template AS pt
+                   SET {", ".join(f'{column} = v.{column}' for column in columns)},
+                       write_uid = %s, write_date = now() at time zone 'UTC'
+                  FROM (VALUES {", ".join([row_template] * len(batch))}) AS v(id, {", ".join(columns)})
+                 WHERE pt.id = v.id
+            """
+            self.env.cr.execute(query, [self.env.uid] + [value for row in batch for value in row])
+        self.env.invalidate_all()
+
+    @api.model
+    def _bulk_create_or_update_from_dummy_erp_dicts(self, integration_id, products):
+        """
+        Bulk import variant of create_or_update_from_dummy_erp_payload: existing products are fetched with one search
+        per batch and new products are created with one batch create, in the bulk import context.
+        :param integration_id: dummy.erp.integration object
+        :param products: list of dicts returned by prepare_dicts_from_dummy_erp_payload
+        :return: None
+        """
+        for model, batch in integration_id._iter_import_batches(self, products):
+            model = model.with_context(do_not_update_dummy_erp=True)
+            existing = {
+                product.dummy_erp_id: product
+                for product in model.with_context(active_test=False).search([
+                    ("dummy_erp_integration_id", "=", integration_id.id),
+                    ("dummy_erp_id", "in", [vals["id"] for vals in batch if vals["id"]]),
+                ])
+            }
+            to_create = []
+            for product_dict in batch:
+                dummy_erp_id = product_dict.pop("id")
+                if not dummy_erp_id:
+                    continue
+                if dummy_erp_id in existing:
+                    existing[dummy_erp_id].write(product_dict)
                 else:
-                    self.create(product_dict)
+                    to_create.append(product_dict)
+            model.create(to_create)
 
     @api.model
     def prepare_dicts_from_dummy_erp_payload(self, integration_id, payload):
         """
-        Prepare the odoo-compatible dictionaries for creating or writing products
+        Prepare the odoo-compatible dictionaries for creating or writing products. The payload is mapped by the pure
+        functions of the transform module, with the category ids looked up once for the whole payload, then the images
+        are downloaded unless they are lazy.
         :param integration_id: dummy.erp.integration object
         :param payload: list of dictionaries containing products' data imported from Dummy ERP
-        :return:
-        """
-        product_dicts = []
-        for product in payload:
-            image_1920 = False
-            if len(product["images"]) > 0:
-                # Get image data from URL
-                image_1920 = base64.b64encode(requests.get(product["images"][0]).content)
-            product_dicts.append({
-                "id": product["id"],
-                "name": product["title"],
-                # Since all products have stock attribute then they all should be stored
-                "detailed_type": "product",
-                "list_price": product["price"],
-                "description_sale": product["description"],
-                "taxes_id": integration_id.default_tax_ids.ids,
-                "categ_id": self.get_category_by_name(product["category"]),
-                "dummy_erp_rating": product["rating"],
-                "dummy_erp_brand": product["brand"],
-                "dummy_erp_stock": product["stock"],
-                "dummy_erp_id": product["id"],
-                # Synced products don't need to be updated in dummy ERP because when they arrive they are same
-                "update_to_dummy_erp": False,
-                "dummy_erp_integration_id": integration_id.id,
-                "image_1920": image_1920,
-                # Enable all products in website for users to create them
-                "website_published": True
-            })
+        :return: list of dicts
+        """
+        lookups = TransformLookups(
+            integration_id.id,
+            tax_ids=integration_id.default_tax_ids.ids,
+            category_ids=self._get_category_ids_by_name({data["category"] for data in payload}),
+        )
+        product_dicts = transform_payload(
+            parse_product, product_vals, payload, lookups, integration_id.transform_processes
+        )
+        if not integration_id.lazy_images:
+            for product_dict in product_dicts:
+                image_1920 = False
+                if product_dict["dummy_erp_image_url"]:
+                    # Get image data from URL
+                    with sync_stage("images"):
+                        image_1920 = base64.b64encode(fetch_url(integration_id, product_dict["dummy_erp_image_url"]))
+                product_dict["image_1920"] = image_1920
         return product_dicts
@@ -1,10 +1,12 @@
-import requests
 import base64
 
 from odoo import api, fields, models, SUPERUSER_ID, _
+from odoo.fields import Command
 
-from .api_client import perform_request
+from .api_client import perform_request, fetch_url, CircuitOpenError
 from .dummy_erp_integration import DUMMY_JSON_PATHS
+from .sync_run import sync_stage
+from .transform import parse_user, transform_payload, user_vals, TransformLookups
 
 
 class ResUsers(models.Model):
@@ -26,6 +28,16 @@ class ResUsers(models.Model):
     weight = fields.Float("Weight")
     eye_color = fields.Char("Eye Color")
     university = fields.Char("University")
+    dummy_erp_image_url = fields.Char("Dummy ERP Image URL")
+
+    # Override write to drop the stored image when the remote image changed, so the new one is fetched when displayed
+    def write(self, vals):
+        if "dummy_erp_image_url" in vals and "image_1920" not in vals:
+            image_changed = self.filtered(lambda rec: rec.dummy_erp_image_url != vals["dummy_erp_image_url"])
+            res = super(ResUsers, self - image_changed).write(vals)
+            super(ResUsers, image_changed).write(dict(vals, image_1920=False))
+            return res
+        return super(ResUsers, self).write(vals)
 
     @api.model
     def create_or_update_from_dummy_erp_payload(self, integration_id, payload):
@@ -35,68 +47,98 @@ class ResUsers(models.Model):
         :param payload: list of dicts imported from Dummy ERP containing users values
         :return: None
         """
-        users = self.prepare_dicts_from_dummy_erp_payload(integration_id, payload)
-        for user_dict in users:
-            if user_dict["id"]:
-                user_obj = self.search(
-                    [("dummy_erp_id", "=", user_dict["id"])], limit=1
-                )
-                user_dict.pop('id')
-                password = user_dict.pop("password")
-                if user_obj:
-                    user_obj.write(user_dict)
+        with sync_stage("transform"):
+            users = self.prepare_dicts_from_dummy_erp_payload(integration_id, payload)
+        with sync_stage("write"):
+            if integration_id.bulk_import:
+                self._bulk_create_or_update_from_dummy_erp_dicts(integration_id, users)
+                return
+            for user_dict in users:
+                if user_dict["id"]:
+                    user_obj = self.with_context(active_test=False).search([
+                        ("dummy_erp_integration_id", "=", integration_id.id),
+                        ("dummy_erp_id", "=", user_dict["id"]),
+                    ], limit=1)
+                    user_dict.pop('id')
+                    password = user_dict.pop("password")
+                    if user_obj:
+                        user_obj.write(user_dict)
+                    else:
+                        user_obj = self.create(user_dict)
+                    user_obj._change_password(password)
+
+    @api.model
+    def _bulk_create_or_update_from_dummy_erp_dicts(self, integration_id, users):
+        """
+        Bulk import variant of create_or_update_from_dummy_erp_payload: existing users are fetched with one search per
+        batch, new users and their partners are created with one batch create and the portal group is given to the
+        updated users with one write per batch. Passwords are written with the other values instead of one
+        _change_password call per user.
+        :param integration_id: dummy.erp.integration object
+        :param users: list of dicts returned by prepare_dicts_from_dummy_erp_payload
+        :return: None
+        """
+        group_portal = self.env.ref("base.group_portal")
+        for model, batch in integration_id._iter_import_batches(self, users):
+            existing = {
+                user.dummy_erp_id: user
+                for user in model.with_context(active_test=False).search([
+                    ("dummy_erp_integration_id", "=", integration_id.id),
+                    ("dummy_erp_id", "in", [vals["id"] for vals in batch if vals["id"]]),
+                ])
+            }
+            to_create = []
+            updated_users = model.browse()
+            for user_dict in batch:
+                dummy_erp_id = user_dict.pop("id")
+                if not dummy_erp_id:
+                    continue
+                if dummy_erp_id in existing:
+                    user_dict.pop("groups_id")
+                    existing[dummy_erp_id].write(user_dict)
+                    updated_users |= existing[dummy_erp_id]
                 else:
-                    user_obj = self.create(user_dict)
-                user_obj._change_password(password)
+                    to_create.append(user_dict)
+            model.create(to_create)
+            users_without_portal = updated_users.filtered(lambda user: group_portal not in user.groups_id)
+            if users_without_portal:
+                group_portal.write({"users": [Command.link(user.id) for user in users_without_portal]})
 
     @api.model
     def prepare_dicts_from_dummy_erp_payload(self, integration_id, payload):
         """
-        Prepare the creation dictionary from the payload imported from Dummy ERP
+        Prepare the creation dictionaries from the payload imported from Dummy ERP, mapped by the pure functions of the
+        transform module, then download the images unless they are lazy.
         :param integration_id: dummy.erp.integration object
-        :param payload: dict with values imported from Dummy ERP
-        :return: dict containing the values to create a user in Odoo
+        :param payload: list of dicts with values imported from Dummy ERP
+        :return: list of dicts containing the values to create a user in Odoo
         """
-        group_portal = self.env.ref("base.group_portal")
-        user_dicts = []
-        for user in payload:
-            image_1920 = False
-            name = user["firstName"] or "" + user["maidenName"] or "" + user["lastName"] or ""
-            if "image" in user:
-                # Get image data from URL
-                image_1920 = base64.b64encode(requests.get(user["image"]).content)
-            user_dicts.append({
-                "id": user["id"],
-                "groups_id": [(4, group_portal.id)],
-                "image_1920": image_1920,
-                "name": name,
-                "first_name": user["firstName"],
-                "last_name": user["lastName"],
-                "maiden_name": user["maidenName"],
-                "email": user["email"],
-                "login": user["username"],
-                "password": user["password"],
-                "age": user["age"],
-                "gender": user["gender"],
-                "birth_date": user["birthDate"],
-                "blood_group": user["bloodGroup"],
-                "height": user["height"],
-                "weight": user["weight"],
-                "eye_color": user["eyeColor"],
-                "university": user["university"],
-                "dummy_erp_integration_id": integration_id.id,
-                "dummy_erp_id": user["id"]
-            })
+        lookups = TransformLookups(
+            integration_id.id, groups_commands=[(4, self.env.ref("base.group_portal").id)]
+        )
+        user_dicts = transform_payload(parse_user, user_vals, payload, lookups, integration_id.transform_processes)
+        if not integration_id.lazy_images:
+            for user_dict in user_dicts:
+                image_1920 = False
+                if user_dict["dummy_erp_image_url"]:
+                    # Get image data from URL
+                    with sync_stage("images"):
+                        image_1920 = base64.b64encode(fetch_url(integration_id, user_dict["dummy_erp_image_url"]))
+                user_dict["image_1920"] = image_1920
         return user_dicts
 
-    # Override log in function to import carts when user with dummy_erp_id successfully logs in
+    # Override log in function to enqueue the import of carts when user with dummy_erp_id successfully logs in
     @classmethod
     def _login(cls, db, login, password, user_agent_env):
         res = super(ResUsers, cls)._login(db, login, password, user_agent_env=user_agent_env)
         if res:
             with cls.pool.cursor() as cr:
                 self = api.Environment(cr, SUPERUSER_ID, {})[cls._name]
-                self.env["res.users"].search([("id", "=", res)], limit=1).get_dummy_erp_user_carts()
+                user = self.env["res.users"].search([("id", "=", res)], limit=1)
+                if user.dummy_erp_integration_id and user.dummy_erp_id:
+                    self.env["dummy.erp.integration"].enqueue_dummy_erp_job(
+                        user.dummy_erp_integration_id.id, "import_dummy_user_carts", args=[user.id], priority=5
+                    )
         return res
 
     def get_dummy_erp_user_carts(self):
@@ -132,7 +174,12 @@ class ResUsers(models.Model):
                         "error",
                     )
 
+            except CircuitOpenError:
+                # The remote ERP is known to be down, carts will be imported on the next login
+                return
             except Exception as exc:
+                if self.env.context.get("dummy_erp_job"):
+                    raise
                 integration.log_operation(
                     _("Import User Carts"),
                     (f"Exception: {str(exc)}"),
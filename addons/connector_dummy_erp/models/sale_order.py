@@ -1,4 +1,8 @@
-from odoo import models, fields, api
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.fields import Command
 
 
 class SaleOrder(models.Model):
@@ -20,16 +24,89 @@ class SaleOrder(models.Model):
 
     # Indicating whether this order should be updated in the dummy ERP. By default, created orders should be synced.
     update_to_dummy_erp = fields.Boolean(default=True)
+    # Debounce of the cart export: first and last change since the last export, and a counter of the changes used to
+    # detect a cart modified while it was being exported
+    dummy_erp_first_change = fields.Datetime("First Unexported Change", copy=False)
+    dummy_erp_last_change = fields.Datetime("Last Change", copy=False)
+    dummy_erp_sync_version = fields.Integer(copy=False)
+
+    @api.model
+    def _get_carts_to_update_domain(self, integration=None):
+        """
+        Domain of the orders to export. With an integration, carts still being edited are left out until they have
+        not changed for its cart_quiet_period, or their first unexported change is older than its cart_max_delay.
+        :param integration: optional dummy.erp.integration object
+        :return: list: domain
+        """
+        domain = [("update_to_dummy_erp", "=", True)]
+        if integration:
+            now = fields.Datetime.now()
+            domain += [
+                "|", "|",
+                ("dummy_erp_last_change", "=", False),
+                ("dummy_erp_last_change", "<=", now - timedelta(seconds=integration.cart_quiet_period)),
+                ("dummy_erp_first_change", "<=", now - timedelta(seconds=integration.cart_max_delay)),
+            ]
+        return domain
 
     @api.model
-    def get_carts_to_update(self):
+    def get_carts_to_update(self, integration=None):
         """
         Get orders that need to be updated in the remote Dummy ERP
+        :param integration: optional dummy.erp.integration object, to leave out the carts still being edited
         :return: List of dictionaries that are sent as a payload for the remote Dummy ERP
         """
-        products = self.search([("update_to_dummy_erp", "=", True)])
+        products = self.search(self._get_carts_to_update_domain(integration))
         return self.prepare_dummy_erp_payload(products)
 
+    def _mark_dummy_erp_dirty(self):
+        """
+        Mark the orders as to be exported and record the change for the export debounce. The change counter is
+        incremented in SQL so concurrent changes are all counted.
+        :return: None
+        """
+        if not self:
+            return
+        self.flush_recordset(["update_to_dummy_erp", "dummy_erp_first_change", "dummy_erp_last_change",
+                              "dummy_erp_sync_version"])
+        self.env.cr.execute(
+            """
+            UPDATE sale_order
+               SET update_to_dummy_erp = true,
+                   dummy_erp_sync_version = dummy_erp_sync_version + 1,
+                   dummy_erp_last_change = now() at time zone 'UTC',
+                   dummy_erp_first_change = COALESCE(dummy_erp_first_change, now() at time zone 'UTC')
+             WHERE id IN %s
+            """,
+            (tuple(self.ids),),
+        )
+        self.invalidate_recordset(["update_to_dummy_erp", "dummy_erp_first_change", "dummy_erp_last_change",
+                                   "dummy_erp_sync_version"])
+
+    def _mark_dummy_erp_exported(self, dummy_erp_id, sync_version):
+        """
+        Store the remote id of an exported order and clear its export flag, unless the order changed since its payload
+        was prepared: it then stays flagged so its last changes are exported by the next run.
+        :param dummy_erp_id: id of the cart in the remote Dummy ERP
+        :param sync_version: dummy_erp_sync_version of the order when its payload was prepared
+        :return: None
+        """
+        self.ensure_one()
+        self.flush_recordset(["dummy_erp_id", "update_to_dummy_erp", "dummy_erp_first_change",
+                              "dummy_erp_sync_version"])
+        self.env.cr.execute(
+            """
+            UPDATE sale_order
+               SET dummy_erp_id = %s,
+                   update_to_dummy_erp = dummy_erp_sync_version != %s,
+                   dummy_erp_first_change = CASE WHEN dummy_erp_sync_version != %s
+                                                 THEN dummy_erp_first_change END
+             WHERE id = %s
+            """,
+            (dummy_erp_id, sync_version, sync_version, self.id),
+        )
+        self.invalidate_recordset(["dummy_erp_id", "update_to_dummy_erp", "dummy_erp_first_change"])
+
     @api.model
     def prepare_dummy_erp_payload(self, recs):
         """
@@ -56,6 +133,7 @@ class SaleOrder(models.Model):
                 "id": rec.dummy_erp_id,
                 "userId": user_id.dummy_erp_id,
                 "cart_obj": rec,
+                "sync_version": rec.dummy_erp_sync_version,
                 "products": lines
             })
         return payload
@@ -71,30 +149,7 @@ class SaleOrder(models.Model):
         """
         for cart in carts:
             if not self.search([("dummy_erp_id", "=", cart["id"])], limit=1):
-                lines = []
-                for item in cart["products"]:
-                    product_id = self.env["product.template"].get_product_id_by_dummy_erp_id(
-                        item["id"]
-                    )
-                    if product_id:
-                        line_price = item["price"]
-                        line_discount = item["discountPercentage"]
-                        line_quantity = item["quantity"]
-                        lines.append(
-                            [
-                                0,
-                                0,
-                                {
-                                    "product_id": product_id.id,
-                                    "product_uom_qty": line_quantity,
-                                    "price_unit": line_price,
-                                    "discount": line_discount,
-                                },
-                            ]
-                        )
-                    else:
-                        continue
-
+                lines = self._prepare_dummy_erp_order_lines(cart)
                 website_id = self._dummy_erp_default_website()
                 self.env["sale.order"].create({
                     "partner_id": user_id.partner_id.id,
@@ -105,3 +160,57 @@ class SaleOrder(models.Model):
                     "dummy_erp_integration_id": integration_id.id,
                     "order_line": lines,
                 })
+
+    @api.model
+    def _prepare_dummy_erp_order_lines(self, cart):
+        """
+        Prepare the order line commands of a cart imported from the remote Dummy ERP. Products not imported yet are
+        left out.
+        :param cart: dict containing the payload of the cart
+        :return: list of create commands
+        """
+        lines = []
+        for item in cart["products"]:
+            product_id = self.env["product.template"].get_product_id_by_dummy_erp_id(
+                item["id"]
+            )
+            if product_id:
+                lines.append(Command.create({
+                    "product_id": product_id.id,
+                    "product_uom_qty": item["quantity"],
+                    "price_unit": item["price"],
+                    "discount": item["discountPercentage"],
+                }))
+        return lines
+
+    @api.model
+    def update_from_dummy_erp_payload(self, user_id, integration_id, cart):
+        """
+        Create the sale order of a cart changed in the remote Dummy ERP, or replace the lines of its existing order.
+        :param user_id: res.users object owning the cart
+        :param integration_id: dummy.erp.integration object
+        :param cart: dict containing the payload of the cart
+        :return: None
+        """
+        order = self.search([("dummy_erp_id", "=", cart["id"])], limit=1)
+        if not order:
+            self.create_from_dummy_erp_payload(user_id, integration_id, [cart])
+            return
+        if order.state not in ("draft", "sent"):
+            raise UserError(_("Order %s is confirmed, it cannot be updated from dummy ERP cart %s", order.name,
+                              cart["id"]))
+        order = order.with_context(do_not_update_dummy_erp=True)
+        order.write({"order_line": [Command.clear()] + self._prepare_dummy_erp_order_lines(cart)})
+        # The order now matches the remote cart, the new lines must not be exported back
+        order.write({"update_to_dummy_erp": False, "dummy_erp_first_change": False})
+
+    def cancel_from_dummy_erp(self):
+        """
+        Cancel the orders of carts deleted in the remote Dummy ERP.
+        :return: None
+        """
+        confirmed = self.filtered(lambda order: order.state not in ("draft", "sent", "cancel"))
+        if confirmed:
+            raise UserError(_("Orders %s are confirmed, they cannot be cancelled from dummy ERP",
+                              ", ".join(confirmed.mapped("name"))))
+        self.filtered(lambda order: order.state != "cancel").with_context(do_not_update_dummy_erp=True)._action_cancel()
@@ -17,7 +17,7 @@ class SaleOrderLine(models.Model):
         user_id = order_id.partner_id.user_ids[0] if len(order_id.partner_id.user_ids) > 0 else False
         if len(dummy_erp_updated_fields) > 0 and not self.env.context.get('do_not_update_dummy_erp',
                                                                           False) and user_id and user_id.dummy_erp_id:
-            order_id.update_to_dummy_erp = True
+            order_id._mark_dummy_erp_dirty()
         return res
 
     # TODO: Override method for batch creation
@@ -25,5 +25,13 @@ class SaleOrderLine(models.Model):
     @api.model
     def create(self, vals):
         res = super(SaleOrderLine, self).create(vals)
-        res.order_id.update_to_dummy_erp = True
+        res.order_id._mark_dummy_erp_dirty()
+        return res
+
+    # Override unlink function to mark the orders of removed lines as update_to_dummy_erp
+    def unlink(self):
+        orders = self.order_id
+        res = super(SaleOrderLine, self).unlink()
+        if not self.env.context.get('do_not_update_dummy_erp', False):
+            orders.exists()._mark_dummy_erp_dirty()
         return res
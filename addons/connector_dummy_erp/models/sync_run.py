@@ -0,0 +1,137 @@
+import cProfile
+import heapq
+import io
+import marshal
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Number of slowest SQL statements and of cProfile functions kept in a profile report
+PROFILE_TOP_QUERIES = 20
+PROFILE_TOP_FUNCTIONS = 40
+
+_local = threading.local()
+
+
+class SyncRun:
+    """
+    Measures one run of a sync job (import or export): wall time of its stages and, when profiling, a cProfile of the
+    whole run and its slowest SQL statements. Stages may be nested, e.g. image downloads are part of the transform
+    stage. The run being measured in the current thread is available through
+    current_run() so models can time their stages without receiving it as argument.
+    """
+
+    def __init__(self, job_type, profile=False):
+        self.job_type = job_type
+        self.profile = profile
+        self.stages = {}
+        self.slow_queries = []
+        self.query_count = 0
+        self.duration = 0.0
+        # Totals kept in the hourly statistics of the integration
+        self.record_count = 0
+        self.http_call_count = 0
+        self.failed = False
+        self._profiler = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        _local.run = self
+        if self.profile:
+            thread = threading.current_thread()
+            thread.query_hooks = getattr(thread, "query_hooks", ()) + (self._query_hook,)
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler:
+            self._profiler.disable()
+            thread = threading.current_thread()
+            thread.query_hooks = tuple(hook for hook in thread.query_hooks if hook != self._query_hook)
+        _local.run = None
+        self.duration = time.perf_counter() - self._start
+
+    def _query_hook(self, cr, query, params, start, delay):
+        self.query_count += 1
+        if isinstance(query, bytes):
+            query = query.decode(errors="replace")
+        entry = (delay, self.query_count, " ".join(str(query).split()))
+        if len(self.slow_queries) < PROFILE_TOP_QUERIES:
+            heapq.heappush(self.slow_queries, entry)
+        else:
+            heapq.heappushpop(self.slow_queries, entry)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        """
+        Human readable profile: stage timers, slowest SQL statements and the most expensive functions.
+        :return: str
+        """
+        lines = [f"Run duration: {self.duration:.3f}s", "", "Stages (wall time):"]
+        for name, duration in self.stages.items():
+            lines.append(f"  {name:<12} {duration:.3f}s")
+        lines += ["", f"Slowest SQL statements ({self.query_count} queries):"]
+        for delay, _index, query in sorted(self.slow_queries, reverse=True):
+            lines.append(f"  {delay * 1000:.1f}ms  {query[:500]}")
+        if self._profiler:
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            lines += ["", "cProfile (cumulative):", stream.getvalue()]
+        return "\n".join(lines)
+
+    def dump_stats(self):
+        """
+        cProfile dump, loadable with pstats.Stats or viewers like snakeviz.
+        :return: bytes
+        """
+        self._profiler.create_stats()
+        return marshal.dumps(self._profiler.stats)
+
+
+def current_run():
+    """
+    :return: SyncRun measured in the current thread, or None
+    """
+    return getattr(_local, "run", None)
+
+
+@contextmanager
+def sync_stage(name):
+    """
+    Time the enclosed code as a stage of the run measured in the current thread, if any.
+    :param name: stage name, e.g. fetch, transform, write or log
+    """
+    run = current_run()
+    if run is None:
+        yield
+    else:
+        with run.stage(name):
+            yield
+
+
+def count_records(count):
+    """
+    Add records processed by the run measured in the current thread, if any.
+    :param count: number of imported or exported records
+    """
+    run = current_run()
+    if run is not None:
+        run.record_count += count
+
+
+def count_http_call():
+    """
+    Count a request to the remote ERP made by the run measured in the current thread, if any.
+    """
+    run = current_run()
+    if run is not None:
+        run.http_call_count += 1
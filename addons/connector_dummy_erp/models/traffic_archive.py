@@ -0,0 +1,165 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers kept in the archive, the others are not needed to replay a response
+RECORDED_HEADERS = ("Content-Type", "Content-Encoding")
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+class TrafficReplayError(Exception):
+    """
+    Raised when replaying a request which was not recorded in the traffic archive.
+    """
+
+
+class TrafficArchive:
+    """
+    Compact on-disk archive of HTTP request/response pairs, stored in a zip file. Each exchange is stored as a JSON
+    entry (request, status, headers, latency) and a body entry, both named after the hash of the request and the
+    number of times the same request was recorded, so repeated requests are replayed in their recorded order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.replayed = {}
+        self.loaded_stat = None
+        with self.file_lock(shared=True):
+            self.refresh_counts()
+
+    @contextmanager
+    def file_lock(self, shared=False):
+        """
+        Lock the archive against the other processes appending to it. The thread lock only protects the archive
+        object of the current process, workers record to the same file with their own archive object.
+        :param shared: take a shared lock to read the archive, instead of an exclusive one to append to it
+        :return: context manager
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh_counts(self):
+        """
+        Count the recorded exchanges of each request again if the zip file changed since it was last read, e.g.
+        because another process recorded to it. Must be called under the file lock.
+        :return: None
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.counts, self.loaded_stat = {}, None
+            return
+        if (stat.st_mtime_ns, stat.st_size) == self.loaded_stat:
+            return
+        counts = {}
+        with zipfile.ZipFile(self.path) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    key = name.split("/")[0]
+                    counts[key] = counts.get(key, 0) + 1
+        self.counts, self.loaded_stat = counts, (stat.st_mtime_ns, stat.st_size)
+
+    def start_replay(self):
+        """
+        Start replaying the archive from its first recorded responses, with the exchanges recorded so far.
+        :return: None
+        """
+        with self.lock, self.file_lock(shared=True):
+            self.replayed = {}
+            self.refresh_counts()
+
+    @staticmethod
+    def request_key(method, url, payload):
+        request = json.dumps([method.upper(), url, payload], sort_keys=True, default=str)
+        return hashlib.sha1(request.encode()).hexdigest()
+
+    def record(self, method, url, payload, response, latency):
+        """
+        Append an exchange to the archive.
+        :param method: HTTP method
+        :param url: request URL
+        :param payload: JSON payload of the request
+        :param response: requests.Response
+        :param latency: response time in seconds
+        :return: None
+        """
+        key = self.request_key(method, url, payload)
+        meta = {
+            "method": method.upper(),
+            "url": url,
+            "payload": payload,
+            "status_code": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "encoding": response.encoding,
+            "latency": latency,
+        }
+        with self.lock, self.file_lock():
+            # Another process may have recorded the same request since the counts were read
+            self.refresh_counts()
+            index = self.counts.get(key, 0)
+            with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(f"{key}/{index}.json", json.dumps(meta, default=str))
+                archive.writestr(f"{key}/{index}.body", response.content)
+            self.counts[key] = index + 1
+            stat = os.stat(self.path)
+            self.loaded_stat = (stat.st_mtime_ns, stat.st_size)
+
+    def replay(self, method, url, payload, latency_scale=1.0):
+        """
+        Serve a recorded response, after waiting for its recorded latency multiplied by latency_scale. A request
+        recorded several times gets its recorded responses in order, the last one being served again once exhausted.
+        :param method: HTTP method
+        :param url: request URL
+        :param payload: JSON payload of the request
+        :param latency_scale: multiplier of the recorded latency, 0 replays without waiting
+        :return: requests.Response
+        """
+        key = self.request_key(method, url, payload)
+        with self.lock, self.file_lock(shared=True):
+            self.refresh_counts()
+            if key not in self.counts:
+                raise TrafficReplayError(f"No recorded response for {method.upper()} {url}")
+            index = min(self.replayed.get(key, 0), self.counts[key] - 1)
+            self.replayed[key] = index + 1
+            with zipfile.ZipFile(self.path) as archive:
+                meta = json.loads(archive.read(f"{key}/{index}.json"))
+                body = archive.read(f"{key}/{index}.body")
+        if latency_scale:
+            time.sleep(meta["latency"] * latency_scale)
+        response = requests.Response()
+        response.status_code = meta["status_code"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = meta["encoding"]
+        response.url = url
+        response._content = body
+        return response
+
+
+def get_traffic_archive(path):
+    """
+    Return the archive of the given path, shared by all threads of the process. Its replay cursors are kept between
+    runs, start_replay resets them.
+    :param path: path of the zip file
+    :return: TrafficArchive
+    """
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = TrafficArchive(path)
+        return _archives[path]
@@ -0,0 +1,179 @@
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from importlib.machinery import SourceFileLoader
+from itertools import repeat
+
+# Payloads smaller than this are always mapped in the calling process, starting the pool would cost more than it saves
+TRANSFORM_POOL_MIN_RECORDS = 10000
+# Name of this module in the pool workers. They load it from its file: importing it from odoo.addons would need Odoo
+# and the addons path of the server, this module only needs the standard library
+TRANSFORM_MODULE = "connector_dummy_erp_transform"
+
+
+class CompactRecord:
+    """
+    Base class of the records parsed from Dummy ERP payloads. Records only hold the values used by the import in
+    __slots__.
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+class ProductRecord(CompactRecord):
+    __slots__ = ("remote_id", "title", "description", "price", "category", "rating", "brand", "stock", "image_url")
+
+
+class UserRecord(CompactRecord):
+    __slots__ = ("remote_id", "first_name", "last_name", "maiden_name", "email", "username", "password", "age",
+                 "gender", "birth_date", "blood_group", "height", "weight", "eye_color", "university", "image_url")
+
+
+class TransformLookups:
+    """
+    Odoo ids needed to map records to create/write values, built once per payload by the models so the mapping
+    functions never call the ORM. List values are shared by all the mapped dictionaries and must not be mutated.
+    """
+    __slots__ = ("integration_id", "tax_ids", "category_ids", "groups_commands")
+
+    def __init__(self, integration_id, tax_ids=None, category_ids=None, groups_commands=None):
+        self.integration_id = integration_id
+        self.tax_ids = tax_ids or []
+        self.category_ids = category_ids or {}
+        self.groups_commands = groups_commands or []
+
+
+def parse_product(data):
+    """
+    :param data: product dict of the Dummy ERP payload
+    :return: ProductRecord
+    """
+    return ProductRecord(
+        data["id"], data["title"], data["description"], data["price"], data["category"], data["rating"],
+        data["brand"], data["stock"], data["images"][0] if len(data["images"]) > 0 else False,
+    )
+
+
+def parse_user(data):
+    """
+    :param data: user dict of the Dummy ERP payload
+    :return: UserRecord
+    """
+    return UserRecord(
+        data["id"], data["firstName"], data["lastName"], data["maidenName"], data["email"], data["username"],
+        data["password"], data["age"], data["gender"], data["birthDate"], data["bloodGroup"], data["height"],
+        data["weight"], data["eyeColor"], data["university"], data.get("image", False),
+    )
+
+
+def product_vals(record, lookups):
+    """
+    Map a product record to the values creating or writing a product.template, without its image.
+    :param record: ProductRecord
+    :param lookups: TransformLookups with the category ids of the record categories
+    :return: dict
+    """
+    return {
+        "id": record.remote_id,
+        "name": record.title,
+        # Since all products have stock attribute then they all should be stored
+        "detailed_type": "product",
+        "list_price": record.price,
+        "description_sale": record.description,
+        "taxes_id": lookups.tax_ids,
+        "categ_id": lookups.category_ids[record.category],
+        "dummy_erp_rating": record.rating,
+        "dummy_erp_brand": record.brand,
+        "dummy_erp_stock": record.stock,
+        "dummy_erp_id": record.remote_id,
+        # Synced products don't need to be updated in dummy ERP because when they arrive they are same
+        "update_to_dummy_erp": False,
+        "dummy_erp_integration_id": lookups.integration_id,
+        "dummy_erp_image_url": record.image_url,
+        # Records archived because they were deleted remotely are restored when they come back
+        "active": True,
+        # Enable all products in website for users to create them
+        "website_published": True
+    }
+
+
+def user_vals(record, lookups):
+    """
+    Map a user record to the values creating or writing a res.users, without its image.
+    :param record: UserRecord
+    :param lookups: TransformLookups with the commands of the groups given to imported users
+    :return: dict
+    """
+    return {
+        "id": record.remote_id,
+        "groups_id": lookups.groups_commands,
+        "dummy_erp_image_url": record.image_url,
+        "name": record.first_name or "" + record.maiden_name or "" + record.last_name or "",
+        "first_name": record.first_name,
+        "last_name": record.last_name,
+        "maiden_name": record.maiden_name,
+        "email": record.email,
+        "login": record.username,
+        "password": record.password,
+        "age": record.age,
+        "gender": record.gender,
+        "birth_date": record.birth_date,
+        "blood_group": record.blood_group,
+        "height": record.height,
+        "weight": record.weight,
+        "eye_color": record.eye_color,
+        "university": record.university,
+        "dummy_erp_integration_id": lookups.integration_id,
+        "dummy_erp_id": record.remote_id,
+        # Records archived because they were deleted remotely are restored when they come back
+        "active": True
+    }
+
+
+def _transform_chunk(parse_name, vals_name, chunk, lookups):
+    module = sys.modules[__name__]
+    parse, to_vals = getattr(module, parse_name), getattr(module, vals_name)
+    return [to_vals(parse(data), lookups) for data in chunk]
+
+
+def _load_standalone_module():
+    """
+    Load this module from its file under TRANSFORM_MODULE, the name its functions and classes are pickled with to be
+    sent to the pool workers, which load the same file under the same name.
+    :return: module
+    """
+    return sys.modules.get(TRANSFORM_MODULE) or SourceFileLoader(TRANSFORM_MODULE, __file__).load_module()
+
+
+def transform_payload(parse, to_vals, payload, lookups, processes=0, min_records=TRANSFORM_POOL_MIN_RECORDS):
+    """
+    Map a Dummy ERP payload to the values creating or writing records. Large payloads can be mapped in a pool of
+    processes, each parsing and mapping one chunk of the payload. Workers are spawned, never forked from the Odoo
+    worker and its threads, so starting the pool costs about a second and only pays off for very large payloads.
+    :param parse: parse_product or parse_user
+    :param to_vals: product_vals or user_vals
+    :param payload: list of dicts imported from Dummy ERP
+    :param lookups: TransformLookups, with the Odoo ids needed by to_vals for the whole payload
+    :param processes: number of pool processes, 0 or 1 maps the payload in the calling process
+    :param min_records: smallest payload mapped in the pool
+    :return: list of dicts, in the order of the payload
+    """
+    if processes <= 1 or len(payload) < min_records:
+        return _transform_chunk(parse.__name__, to_vals.__name__, payload, lookups)
+    module = _load_standalone_module()
+    chunk_size = -(-len(payload) // processes)
+    chunks = [payload[index:index + chunk_size] for index in range(0, len(payload), chunk_size)]
+    worker_lookups = module.TransformLookups(*(getattr(lookups, name) for name in TransformLookups.__slots__))
+    with ProcessPoolExecutor(
+            max_workers=len(chunks), mp_context=multiprocessing.get_context("spawn"),
+            initializer=SourceFileLoader(TRANSFORM_MODULE, __file__).load_module,
+    ) as executor:
+        return [
+            vals for chunk_vals in executor.map(
+                module._transform_chunk, repeat(parse.__name__), repeat(to_vals.__name__), chunks,
+                repeat(worker_lookups),
+            ) for vals in chunk_vals
+        ]
@@ -1,2 +1,11 @@
 from . import test_product
 from . import test_sale_order
+from . import test_job
+from . import test_circuit_breaker
+from . import test_bulk_import
+from . import test_bulk_import_benchmark
+from . import test_image_cache
+from . import test_sync_run
+from . import test_webhook
+from . import test_traffic_archive
+from . import test_transform
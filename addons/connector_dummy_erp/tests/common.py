@@ -0,0 +1,42 @@
+def product_payload(remote_id, **values):
+    """
+    :param remote_id: id of the product in Dummy ERP
+    :param values: values overriding the defaults of the payload
+    :return: product dict as returned by the Dummy ERP API
+    """
+    return dict({
+        "id": remote_id,
+        "title": f"Product {remote_id}",
+        "description": "Dummy ERP product",
+        "price": 10,
+        "rating": 4.5,
+        "brand": "Dummy",
+        "stock": 10,
+        "category": "dummy",
+        "images": [],
+    }, **values)
+
+
+def user_payload(remote_id, **values):
+    """
+    :param remote_id: id of the user in Dummy ERP
+    :param values: values overriding the defaults of the payload
+    :return: user dict as returned by the Dummy ERP API
+    """
+    return dict({
+        "id": remote_id,
+        "firstName": f"User{remote_id}",
+        "lastName": "Dummy",
+        "maidenName": "",
+        "email": f"user{remote_id}@example.com",
+        "username": f"dummy_erp_user_{remote_id}",
+        "password": "dummy",
+        "age": 30,
+        "gender": "female",
+        "birthDate": "1990-01-01",
+        "bloodGroup": "A+",
+        "height": 170,
+        "weight": 60,
+        "eyeColor": "Green",
+        "university": "Dummy University",
+    }, **values)
@@ -0,0 +1,58 @@
+from odoo.tests import tagged, TransactionCase
+
+from .common import product_payload, user_payload
+
+
+@tagged('post_install', '-at_install')
+class TestBulkImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Bulk Integration',
+            'base_url': 'http://localhost',
+            'bulk_import': True,
+            'lazy_images': True,
+            'job_chunk_size': 2,
+        })
+
+    def _assert_no_messages(self, records):
+        self.assertFalse(self.env['mail.message'].search_count([
+            ('model', '=', records._name), ('res_id', 'in', records.ids),
+        ]), f"Bulk import should not post messages on {records._name}")
+
+    def test_products_are_created_and_updated(self):
+        payload = [product_payload(900400 + index) for index in range(3)]
+        product_tmpl = self.env['product.template']
+        product_tmpl.create_or_update_from_dummy_erp_payload(self.integration, payload)
+        products = product_tmpl.search([('dummy_erp_id', 'in', [data['id'] for data in payload])])
+        self.assertEqual(len(products), 3)
+        product_tmpl.create_or_update_from_dummy_erp_payload(
+            self.integration, [dict(data, price=20, stock=5) for data in payload]
+        )
+        self.assertEqual(product_tmpl.search_count([('dummy_erp_id', 'in', products.mapped('dummy_erp_id'))]), 3)
+        self.assertEqual(set(products.mapped('list_price')), {20})
+        self.assertEqual(set(products.mapped('dummy_erp_stock')), {5})
+        self.assertFalse(any(products.mapped('update_to_dummy_erp')))
+        self._assert_no_messages(products)
+
+    def test_users_are_created_and_updated(self):
+        payload = [user_payload(900400 + index) for index in range(3)]
+        self.env['res.users'].create_or_update_from_dummy_erp_payload(self.integration, payload)
+        users = self.env['res.users'].search([('dummy_erp_id', 'in', [data['id'] for data in payload])])
+        self.assertEqual(len(users), 3)
+        self.env['res.users'].create_or_update_from_dummy_erp_payload(self.integration, [
+            dict(data, email=f"updated{data['id']}@example.com", password='changed') for data in payload
+        ])
+        self.assertEqual(self.env['res.users'].search_count([('dummy_erp_id', 'in', users.mapped('dummy_erp_id'))]),
+                         3)
+        self.assertEqual(sorted(users.mapped('email')), [f'updated{data["id"]}@example.com' for data in payload])
+        portal = self.env.ref('base.group_portal')
+        self.assertTrue(all(portal in user.groups_id for user in users))
+        self.env.flush_all()
+        self.env.cr.execute("SELECT password FROM res_users WHERE id IN %s", (tuple(users.ids),))
+        self.assertTrue(all(users._crypt_context().verify('changed', password)
+                            for password, in self.env.cr.fetchall()))
+        self._assert_no_messages(users)
+        self._assert_no_messages(users.partner_id)
@@ -0,0 +1,50 @@
+import logging
+import time
+
+from odoo.tests import tagged, TransactionCase
+
+from .common import product_payload, user_payload
+
+_logger = logging.getLogger(__name__)
+
+BENCHMARK_SIZE = 200
+
+
+# Run with --test-tags dummy_erp_benchmark, records/sec of both import modes are written to the log
+@tagged('post_install', '-at_install', '-standard', 'dummy_erp_benchmark')
+class TestBulkImportBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Benchmark Integration',
+            'base_url': 'http://localhost',
+        })
+
+    def _benchmark(self, model_name, make_payload, bulk_import, offset):
+        self.integration.bulk_import = bulk_import
+        payload = [make_payload(100000 + offset + index) for index in range(BENCHMARK_SIZE)]
+        start = time.perf_counter()
+        self.env[model_name].create_or_update_from_dummy_erp_payload(self.integration, payload)
+        self.env.flush_all()
+        created = time.perf_counter() - start
+        start = time.perf_counter()
+        self.env[model_name].create_or_update_from_dummy_erp_payload(self.integration, payload)
+        self.env.flush_all()
+        updated = time.perf_counter() - start
+        _logger.info(
+            "%s import (%s): create %.1f records/sec, update %.1f records/sec", model_name,
+            "bulk" if bulk_import else "regular", BENCHMARK_SIZE / created, BENCHMARK_SIZE / updated,
+        )
+        return created + updated
+
+    def test_product_import_benchmark(self):
+        regular = self._benchmark('product.template', product_payload, False, 0)
+        bulk = self._benchmark('product.template', product_payload, True, BENCHMARK_SIZE)
+        _logger.info("product.template bulk import speedup: x%.2f", regular / bulk)
+
+    def test_user_import_benchmark(self):
+        regular = self._benchmark('res.users', user_payload, False, 0)
+        bulk = self._benchmark('res.users', user_payload, True, BENCHMARK_SIZE)
+        _logger.info("res.users bulk import speedup: x%.2f", regular / bulk)
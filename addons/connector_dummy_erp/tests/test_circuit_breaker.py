@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import requests
+
+from odoo.tests import tagged, TransactionCase
+
+from ..models.api_client import perform_request, CircuitOpenError
+
+
+@tagged('post_install', '-at_install')
+class TestCircuitBreaker(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'breaker_threshold': 2,
+        })
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        with patch('requests.request', side_effect=requests.ConnectionError('Remote is down')) as request:
+            for _attempt in range(2):
+                with self.assertRaises(requests.ConnectionError):
+                    perform_request(self.integration, 'GET', {}, '/products')
+            self.assertEqual(self.integration.breaker_state, 'open')
+            with self.assertRaises(CircuitOpenError):
+                perform_request(self.integration, 'GET', {}, '/products')
+            self.assertEqual(request.call_count, 2, "No request should be sent while the breaker is open")
+
+    def test_probe_closes_breaker(self):
+        self.integration.write({
+            'breaker_state': 'open',
+            'breaker_failure_count': 2,
+            'breaker_opened_at': '2000-01-01 00:00:00',
+        })
+        self.env.flush_all()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"status": "ok"}'
+        with patch('requests.request', return_value=response) as request:
+            perform_request(self.integration, 'GET', {}, '/products')
+            self.assertEqual(request.call_count, 2, "The probe should be sent before the request")
+        self.assertEqual(self.integration.breaker_state, 'closed')
+        self.assertEqual(self.integration.breaker_failure_count, 0)
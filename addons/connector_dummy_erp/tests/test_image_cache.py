@@ -0,0 +1,44 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+import requests
+
+from odoo.tests import tagged, TransactionCase
+
+from ..models.image_cache import RemoteImageCache, get_image_cache, get_lazy_image
+
+
+@tagged('post_install', '-at_install')
+class TestImageCache(TransactionCase):
+
+    def test_least_recently_used_image_is_evicted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RemoteImageCache(directory, max_bytes=20)
+            cache.put('http://remote/a.png', b'a' * 10)
+            cache.put('http://remote/b.png', b'b' * 10)
+            # Make "a" the most recently used image
+            os.utime(cache._path('http://remote/b.png'), (0, 0))
+            self.assertEqual(cache.get('http://remote/a.png'), b'a' * 10)
+            cache.put('http://remote/c.png', b'c' * 10)
+            self.assertIsNone(cache.get('http://remote/b.png'))
+            self.assertEqual(cache.get('http://remote/a.png'), b'a' * 10)
+            self.assertEqual(cache.get('http://remote/c.png'), b'c' * 10)
+
+    def test_failed_download_is_not_cached(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+        })
+        product = self.env['product.template'].create({
+            'name': 'Lazy Product',
+            'dummy_erp_integration_id': integration.id,
+            'dummy_erp_image_url': 'http://localhost/missing.png',
+        })
+        response = requests.Response()
+        response.status_code = 404
+        response._content = b'Not Found'
+        with patch('requests.get', return_value=response):
+            with self.assertRaises(requests.HTTPError):
+                get_lazy_image(product, 'image_128')
+        self.assertIsNone(get_image_cache(self.env).get('http://localhost/missing.png'))
@@ -0,0 +1,150 @@
+import re
+from unittest.mock import MagicMock, patch
+
+from odoo.tests import tagged, TransactionCase
+
+from ..models.dummy_erp_job import JOB_LOCK_NAMESPACE
+from .common import product_payload, user_payload
+
+
+@tagged('post_install', '-at_install')
+class TestJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+        })
+
+    def test_enqueue_is_deduplicated(self):
+        job = self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, 'import_dummy_products')
+        self.assertEqual(job.channel_id.code, 'import')
+        duplicate = self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id,
+                                                                             'import_dummy_products')
+        self.assertFalse(duplicate, "A sync should not be enqueued again while it is still pending")
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, 'import_dummy_products')
+        with patch('odoo.addons.connector_dummy_erp.models.dummy_erp_integration.perform_request',
+                   side_effect=Exception('Remote is down')):
+            self.env['dummy.erp.job']._cron_run_jobs()
+        self.assertEqual(job.state, 'pending')
+        self.assertEqual(job.attempt, 1)
+        self.assertTrue(job.eta, "A failed job should be delayed before its next attempt")
+        self.assertIn('Remote is down', job.exc_info)
+
+    def test_only_lost_jobs_are_requeued(self):
+        running, lost = [
+            self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, method_name)
+            for method_name in ('import_dummy_products', 'import_dummy_users')
+        ]
+        (running | lost).write({'state': 'started', 'date_started': '2000-01-01 00:00:00'})
+        # The job still running in a worker holds its lock, whatever the time it started
+        self.env.cr.execute('SELECT pg_advisory_lock(%s, %s)', (JOB_LOCK_NAMESPACE, running.id))
+        try:
+            self.env['dummy.erp.job']._requeue_stale_jobs()
+        finally:
+            self.env.cr.execute('SELECT pg_advisory_unlock(%s, %s)', (JOB_LOCK_NAMESPACE, running.id))
+        self.assertEqual(running.state, 'started')
+        self.assertEqual(lost.state, 'pending')
+
+    def test_large_payload_is_split_into_jobs(self):
+        self.integration.job_chunk_size = 2
+        payload = [{'id': index} for index in range(5)]
+        split = self.integration.with_context(dummy_erp_job=True)._split_into_jobs('import_dummy_products', payload)
+        self.assertTrue(split)
+        jobs = self.env['dummy.erp.job'].search([('integration_id', '=', self.integration.id)])
+        self.assertEqual(len(jobs), 3)
+
+    def test_product_and_user_partitioned_imports_both_run(self):
+        self.integration.write({'partition_size': 2, 'lazy_images': True})
+        catalogs = {
+            'products': [product_payload(900210 + index) for index in range(3)],
+            'users': [user_payload(900210 + index) for index in range(3)],
+        }
+
+        def remote_page(integration, method, payload, path):
+            resource, limit, skip = re.match(r'/(\w+)\?limit=(\d+)&skip=(\d+)', path).groups()
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                resource: catalogs[resource][int(skip):int(skip) + int(limit)], 'total': len(catalogs[resource])
+            }
+            return response
+
+        # Both crons fire back to back: the user import must not wait for the product partitions
+        for method_name in ('import_dummy_products', 'import_dummy_users'):
+            self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, method_name)
+        with patch('odoo.addons.connector_dummy_erp.models.dummy_erp_integration.perform_request',
+                   side_effect=remote_page):
+            self.env['dummy.erp.job']._cron_run_jobs()
+        partitions = self.integration.partition_ids
+        self.assertEqual(sorted(partitions.mapped('resource')), ['products'] * 2 + ['users'] * 2)
+        self.assertEqual(set(partitions.mapped('state')), {'done'})
+        self.assertEqual(self.env['product.template'].search_count([('dummy_erp_id', '>=', 900210)]), 3)
+        self.assertEqual(self.env['res.users'].search_count([('dummy_erp_id', '>=', 900210)]), 3)
+        self.assertFalse(self.integration.products_partition_run_key)
+        self.assertFalse(self.integration.users_partition_run_key)
+
+    def test_dispatcher_enqueues_due_syncs(self):
+        self.integration.write({
+            'active': True,
+            'scheduling_mode': 'dispatcher',
+            'auto_import_product': True,
+        })
+        self.assertFalse(self.integration.import_product_cron_id.active,
+                         "Integrations scheduled by the dispatcher should not keep their own crons active")
+        self.env['dummy.erp.integration']._cron_dispatch_integrations()
+        self.assertTrue(self.integration.next_import_product_date, "The first run should be staggered")
+        self.integration.next_import_product_date = '2000-01-01 00:00:00'
+        self.env['dummy.erp.integration']._cron_dispatch_integrations()
+        job = self.env['dummy.erp.job'].search([('integration_id', '=', self.integration.id)])
+        self.assertEqual(job.method_name, 'import_dummy_products')
+
+    def test_partitioned_import_logs_one_summary(self):
+        self.integration.partition_size = 2
+        catalog = [product_payload(900200 + index) for index in range(5)]
+
+        def remote_page(integration, method, payload, path):
+            limit, skip = map(int, re.match(r'/products\?limit=(\d+)&skip=(\d+)', path).groups())
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'products': catalog[skip:skip + limit], 'total': len(catalog)}
+            return response
+
+        self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, 'import_dummy_products')
+        with patch('odoo.addons.connector_dummy_erp.models.dummy_erp_integration.perform_request',
+                   side_effect=remote_page):
+            self.env['dummy.erp.job']._cron_run_jobs()
+        partitions = self.integration.partition_ids
+        self.assertEqual(len(partitions), 3)
+        self.assertEqual(set(partitions.mapped('state')), {'done'})
+        self.assertEqual(self.env['product.template'].search_count([('dummy_erp_id', '>=', 900200)]), 5)
+        self.assertFalse(self.integration.products_partition_run_key, "The import should be complete")
+        summaries = self.integration.integration_log_ids.filtered(lambda log: 'partitions' in (log.details or ''))
+        self.assertEqual(len(summaries), 1)
+
+    def test_dispatcher_ignores_jobs_it_does_not_schedule(self):
+        self.env['ir.config_parameter'].sudo().set_param('connector_dummy_erp.dispatcher_max_concurrency', 1)
+        cron_integration = self.env['dummy.erp.integration'].create({
+            'name': 'Cron Integration',
+            'base_url': 'http://localhost',
+        })
+        webhook_integration = self.env['dummy.erp.integration'].create({
+            'name': 'Webhook Integration',
+            'base_url': 'http://localhost',
+            'scheduling_mode': 'dispatcher',
+        })
+        self.env['dummy.erp.integration'].enqueue_dummy_erp_job(cron_integration.id, 'import_dummy_products')
+        self.env['dummy.erp.integration'].enqueue_dummy_erp_job(webhook_integration.id,
+                                                                 'apply_dummy_erp_webhook_events')
+        self.integration.write({
+            'active': True,
+            'scheduling_mode': 'dispatcher',
+            'auto_import_product': True,
+            'next_import_product_date': '2000-01-01 00:00:00',
+        })
+        self.env['dummy.erp.integration']._cron_dispatch_integrations()
+        self.assertTrue(self.env['dummy.erp.job'].search_count([
+            ('integration_id', '=', self.integration.id), ('method_name', '=', 'import_dummy_products'),
+        ]))
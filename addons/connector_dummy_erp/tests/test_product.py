@@ -1,5 +1,9 @@
+from unittest.mock import MagicMock, patch
+
 from odoo.tests import tagged, TransactionCase
 
+from .common import product_payload
+
 
 @tagged('post_install', '-at_install')
 class TestProduct(TransactionCase):
@@ -21,4 +25,85 @@ class TestProduct(TransactionCase):
                          "When product created it should be by default update to dummy ERP if it does "
                          "not have dummy ERP ID")
 
+    def test_only_changed_fields_are_exported(self):
+        product_tmpl = self.product.product_tmpl_id
+        product_tmpl.with_context(do_not_update_dummy_erp=True).write({
+            'dummy_erp_id': 900006,
+            'update_to_dummy_erp': False,
+        })
+        product_tmpl.list_price = 42
+        product_tmpl.dummy_erp_stock = 7
+        self.assertTrue(product_tmpl.update_to_dummy_erp)
+        self.assertEqual(product_tmpl.dummy_erp_changed_fields, 'dummy_erp_stock,list_price')
+        payload = self.env['product.template'].prepare_dummy_erp_payload(product_tmpl)[0]
+        payload.pop('product_obj')
+        self.assertEqual(payload, {'price': 42, 'stock': 7})
+
+    def test_sql_fast_path_updates_scalar_fields(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'lazy_images': True,
+        })
+        payload = product_payload(900002, images=['http://localhost/fast_path.png'])
+        product_tmpl = self.env['product.template']
+        product_tmpl.create_or_update_from_dummy_erp_payload(integration, [payload])
+        product = product_tmpl.search([('dummy_erp_id', '=', 900002)])
+        integration.sql_fast_path = True
+        # Read through the variant so its inherited price is cached before the SQL update
+        self.assertEqual(product.product_variant_id.lst_price, 10)
+        updated = dict(payload, price=12, stock=3, brand='Faster')
+        remaining = product_tmpl._fast_update_from_dummy_erp_dicts(
+            product_tmpl.prepare_dicts_from_dummy_erp_payload(integration, [updated])
+        )
+        self.assertFalse(remaining, "Only scalar fields changed, the ORM path should not be needed")
+        self.assertEqual(product.list_price, 12)
+        self.assertEqual(product.product_variant_id.lst_price, 12, "Variants should not keep the old price")
+        self.assertEqual(product.dummy_erp_stock, 3)
+        self.assertEqual(product.dummy_erp_brand, 'Faster')
+        self.assertFalse(product.update_to_dummy_erp)
+        renamed = dict(payload, title='Renamed Product')
+        remaining = product_tmpl._fast_update_from_dummy_erp_dicts(
+            product_tmpl.prepare_dicts_from_dummy_erp_payload(integration, [renamed])
+        )
+        self.assertEqual(len(remaining), 1, "A renamed product should go through the ORM")
+
+    def test_remotely_deleted_products_are_archived(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+        })
+        kept, deleted = self.env['product.template'].create([{
+            'name': f'Synced Product {dummy_erp_id}',
+            'dummy_erp_id': dummy_erp_id,
+            'dummy_erp_integration_id': integration.id,
+        } for dummy_erp_id in (900003, 900004)])
+        archived = integration._archive_remotely_deleted('product.template', {900003, 1})
+        self.assertEqual(archived, 1)
+        self.assertTrue(kept.active)
+        self.assertFalse(deleted.active)
+        # The product comes back in the remote ERP: the archived product is restored instead of duplicated
+        integration.lazy_images = True
+        self.env['product.template'].create_or_update_from_dummy_erp_payload(integration, [product_payload(900004)])
+        self.assertTrue(deleted.active)
+        self.assertEqual(self.env['product.template'].search_count([('dummy_erp_id', '=', 900004)]), 1)
+
+    def test_export_streams_products_in_batches(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+        })
+        products = self.env['product.template'].create([{'name': f'Batch Product {index}'} for index in range(3)])
+        to_export = self.env['product.template'].search_count([('update_to_dummy_erp', '=', True)])
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'id': 900300}
+        integration_module = 'odoo.addons.connector_dummy_erp.models.dummy_erp_integration'
+        with patch(f'{integration_module}.EXPORT_BATCH_SIZE', 2), \
+                patch(f'{integration_module}.perform_request', return_value=response) as perform_request:
+            self.env['dummy.erp.integration'].export_dummy_products(integration.id)
+        self.assertEqual(perform_request.call_count, to_export)
+        self.assertFalse(any(products.mapped('update_to_dummy_erp')))
+        log = integration.integration_log_ids[0]
+        self.assertEqual(log.details, f'{to_export} products successfully updated in dummy ERP')
+
     # TODO: Finish testing product all functions
@@ -17,6 +17,12 @@ class TestSaleOrder(TransactionCase):
         cls.partner = cls.env['res.partner'].create({
             'name': 'Test Partner',
         })
+        # Only the carts of dummy ERP users are marked as to update when their lines change
+        cls.env['res.users'].with_context(no_reset_password=True).create({
+            'login': 'test_partner',
+            'partner_id': cls.partner.id,
+            'dummy_erp_id': 900100,
+        })
         cls.order = cls.env['sale.order'].create({
             'partner_id': cls.partner.id,
             'dummy_erp_id': False,
@@ -32,4 +38,29 @@ class TestSaleOrder(TransactionCase):
         self.assertEqual(update_to_dummy_erp, True,
                          "When order created it should be by default update to dummy ERP if it does "
                          "not have dummy ERP ID")
+
+    def test_cart_changed_during_export_stays_to_update(self):
+        version = self.order.dummy_erp_sync_version
+        self.order.order_line[0].product_uom_qty = 3
+        self.assertTrue(self.order.dummy_erp_sync_version > version)
+        # The payload was prepared before the last change: the order must be exported again
+        self.order._mark_dummy_erp_exported(900007, version)
+        self.assertEqual(self.order.dummy_erp_id, 900007)
+        self.assertTrue(self.order.update_to_dummy_erp)
+        self.order._mark_dummy_erp_exported(900007, self.order.dummy_erp_sync_version)
+        self.assertFalse(self.order.update_to_dummy_erp)
+        self.assertFalse(self.order.dummy_erp_first_change)
+
+    def test_cart_being_edited_is_not_exported(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'cart_quiet_period': 3600,
+        })
+        self.order.order_line[0].product_uom_qty = 2
+        domain = self.env['sale.order']._get_carts_to_update_domain(integration)
+        self.assertNotIn(self.order, self.env['sale.order'].search(domain))
+        integration.cart_quiet_period = 0
+        domain = self.env['sale.order']._get_carts_to_update_domain(integration)
+        self.assertIn(self.order, self.env['sale.order'].search(domain))
     # TODO: Finish testing sale order
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock, patch
+
+from odoo.tests import tagged, TransactionCase
+
+from .common import product_payload
+
+
+@tagged('post_install', '-at_install')
+class TestSyncRun(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'profile_next_run': True,
+        })
+
+    def test_profile_is_attached_to_run_log(self):
+        payload = [product_payload(900001)]
+        self.env['dummy.erp.integration'].import_dummy_products(self.integration.id, payload)
+        self.assertFalse(self.integration.profile_next_run, "Profiling should be turned off after one run")
+        log = self.integration.integration_log_ids[0]
+        self.assertTrue(log.profile_file)
+        self.assertIn('Slowest SQL statements', log.details)
+        self.assertIn('write', log.details)
+
+    def test_profiled_job_is_not_split(self):
+        self.integration.job_chunk_size = 2
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'products': [product_payload(900110 + index) for index in range(5)]}
+        self.env['dummy.erp.integration'].enqueue_dummy_erp_job(self.integration.id, 'import_dummy_products')
+        with patch('odoo.addons.connector_dummy_erp.models.dummy_erp_integration.perform_request',
+                   return_value=response):
+            self.env['dummy.erp.job']._cron_run_jobs()
+        jobs = self.env['dummy.erp.job'].search([('integration_id', '=', self.integration.id)])
+        self.assertEqual(len(jobs), 1, "The profiled run should import the whole catalog itself")
+        self.assertEqual(self.env['product.template'].search_count([('dummy_erp_id', '>=', 900110)]), 5)
+        log = self.integration.integration_log_ids.filtered('profile_file')
+        self.assertEqual(len(log), 1)
+        self.assertIn('write', log.details)
+
+    def test_runs_are_aggregated_per_hour(self):
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Stats Integration',
+            'base_url': 'http://localhost',
+        })
+        payload = [product_payload(900100 + index) for index in range(3)]
+        self.env['dummy.erp.integration'].import_dummy_products(integration.id, payload)
+        self.env['dummy.erp.integration'].import_dummy_products(integration.id, payload[:1])
+        stats = self.env['dummy.erp.integration.stats'].search([('integration_id', '=', integration.id)])
+        self.assertEqual(len(stats), 1, "Runs of the same job type and hour should share one row")
+        self.assertEqual(stats.job_type, 'import_dummy_products')
+        self.assertEqual(stats.run_count, 2)
+        self.assertEqual(stats.record_count, 4)
+        self.assertEqual(stats.failure_count, 0)
+        self.assertEqual(stats.http_call_count, 0)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+import requests
+
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged, TransactionCase
+
+from ..models.traffic_archive import TrafficArchive, TrafficReplayError
+
+
+@tagged('post_install', '-at_install')
+class TestTrafficArchive(TransactionCase):
+
+    def _response(self, content):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response._content = content
+        return response
+
+    def test_recorded_responses_are_replayed_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traffic.zip')
+            archive = TrafficArchive(path)
+            archive.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1]}'), 0.5)
+            archive.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1, 2]}'), 0.5)
+            # A new archive object reads what was recorded on disk
+            replay = TrafficArchive(path)
+            self.assertEqual(replay.replay('GET', 'http://remote/products', {}, latency_scale=0).json(),
+                             {'products': [1]})
+            response = replay.replay('GET', 'http://remote/products', {}, latency_scale=0)
+            self.assertEqual(response.json(), {'products': [1, 2]})
+            self.assertEqual(response.headers['content-type'], 'application/json')
+            with self.assertRaises(TrafficReplayError):
+                replay.replay('GET', 'http://remote/users', {}, latency_scale=0)
+
+    def test_archives_of_several_processes_share_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traffic.zip')
+            # Archive objects of two worker processes recording to the same file
+            first, second = TrafficArchive(path), TrafficArchive(path)
+            first.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1]}'), 0)
+            second.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1, 2]}'), 0)
+            self.assertEqual(list(TrafficArchive(path).counts.values()), [2])
+            # The first archive replays the response recorded by the second one
+            first.replay('GET', 'http://remote/products', {}, latency_scale=0)
+            self.assertEqual(first.replay('GET', 'http://remote/products', {}, latency_scale=0).json(),
+                             {'products': [1, 2]})
+
+    def test_replay_restarts_from_the_first_response(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traffic.zip')
+            archive = TrafficArchive(path)
+            archive.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1]}'), 0)
+            archive.record('GET', 'http://remote/products', {}, self._response(b'{"products": [1, 2]}'), 0)
+            archive.replay('GET', 'http://remote/products', {}, latency_scale=0)
+            archive.start_replay()
+            self.assertEqual(archive.replay('GET', 'http://remote/products', {}, latency_scale=0).json(),
+                             {'products': [1]})
+
+    def test_archive_path_is_required_to_record(self):
+        with self.assertRaises(ValidationError):
+            self.env['dummy.erp.integration'].create({
+                'name': 'Test Integration',
+                'base_url': 'http://localhost',
+                'traffic_mode': 'record',
+            })
+        integration = self.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'traffic_mode': 'record',
+            'traffic_archive_path': '/tmp/traffic.zip',
+        })
+        with self.assertRaises(ValidationError):
+            integration.traffic_archive_path = False
@@ -0,0 +1,64 @@
+import logging
+import time
+
+from odoo.tests import tagged, TransactionCase
+
+from ..models.transform import (
+    parse_product, parse_user, product_vals, transform_payload, user_vals, TransformLookups
+)
+from .common import product_payload, user_payload
+
+_logger = logging.getLogger(__name__)
+
+BENCHMARK_SIZE = 20000
+
+
+@tagged('post_install', '-at_install')
+class TestTransform(TransactionCase):
+
+    def test_product_vals_use_lookups(self):
+        payload = product_payload(1, category='benchmark', images=['http://localhost/image.png'])
+        lookups = TransformLookups(7, tax_ids=[3], category_ids={'benchmark': 11})
+        vals = product_vals(parse_product(payload), lookups)
+        self.assertEqual(vals['categ_id'], 11)
+        self.assertEqual(vals['taxes_id'], [3])
+        self.assertEqual(vals['dummy_erp_integration_id'], 7)
+        self.assertEqual(vals['dummy_erp_image_url'], 'http://localhost/image.png')
+        self.assertNotIn('image_1920', vals)
+
+    def test_pool_maps_like_calling_process(self):
+        payload = [product_payload(index, category='benchmark') for index in range(10)]
+        lookups = TransformLookups(1, tax_ids=[3], category_ids={'benchmark': 11})
+        self.assertEqual(
+            transform_payload(parse_product, product_vals, payload, lookups, processes=2, min_records=0),
+            transform_payload(parse_product, product_vals, payload, lookups),
+        )
+
+    def test_categories_are_looked_up_once(self):
+        existing = self.env['product.category'].create({'name': 'Transform Existing'})
+        category_ids = self.env['product.template']._get_category_ids_by_name({'Transform Existing', 'Transform New'})
+        self.assertEqual(category_ids['Transform Existing'], existing.id)
+        self.assertEqual(self.env['product.category'].browse(category_ids['Transform New']).name, 'Transform New')
+
+
+# Run with --test-tags dummy_erp_benchmark, records/sec of the transform are written to the log
+@tagged('post_install', '-at_install', '-standard', 'dummy_erp_benchmark')
+class TestTransformBenchmark(TransactionCase):
+
+    def _benchmark(self, label, parse, to_vals, payload, lookups):
+        for processes in (0, 4):
+            start = time.perf_counter()
+            transform_payload(parse, to_vals, payload, lookups, processes, min_records=0)
+            duration = time.perf_counter() - start
+            _logger.info("%s transform (%s processes): %.1f records/sec", label, processes or 1,
+                         len(payload) / duration)
+
+    def test_product_transform_benchmark(self):
+        payload = [product_payload(index, category='benchmark') for index in range(BENCHMARK_SIZE)]
+        lookups = TransformLookups(1, tax_ids=[1], category_ids={'benchmark': 1})
+        self._benchmark('product.template', parse_product, product_vals, payload, lookups)
+
+    def test_user_transform_benchmark(self):
+        payload = [user_payload(index) for index in range(BENCHMARK_SIZE)]
+        lookups = TransformLookups(1, groups_commands=[(4, 1)])
+        self._benchmark('res.users', parse_user, user_vals, payload, lookups)
@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import json
+
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged, TransactionCase
+
+from .common import product_payload
+
+
+@tagged('post_install', '-at_install')
+class TestWebhook(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.integration = cls.env['dummy.erp.integration'].create({
+            'name': 'Test Integration',
+            'base_url': 'http://localhost',
+            'lazy_images': True,
+            'webhook_secret': 'secret',
+        })
+
+    def test_signature_is_checked(self):
+        body = b'{"resource": "product", "data": {"id": 1}}'
+        signature = hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+        self.assertTrue(self.integration._check_webhook_signature(body, f'sha256={signature}'))
+        self.assertFalse(self.integration._check_webhook_signature(body, 'sha256=forged'))
+
+    def test_latest_event_of_a_record_is_applied(self):
+        product = product_payload(900005)
+        events = self.integration._receive_webhook_events([
+            {'resource': 'product', 'action': 'upsert', 'data': product},
+            {'resource': 'product', 'action': 'upsert', 'data': dict(product, price=15)},
+        ])
+        self.env['dummy.erp.integration'].apply_dummy_erp_webhook_events(self.integration.id)
+        self.assertEqual(events.mapped('state'), ['skipped', 'done'])
+        imported = self.env['product.template'].search([('dummy_erp_id', '=', 900005)])
+        self.assertEqual(imported.list_price, 15)
+
+    def test_incomplete_upsert_is_rejected(self):
+        product = product_payload(900006)
+        del product['title']
+        with self.assertRaises(ValidationError):
+            self.integration._receive_webhook_events([{'resource': 'product', 'action': 'upsert', 'data': product}])
+
+    def test_malformed_events_are_rejected(self):
+        for events in ([1], [{'resource': 'product', 'data': []}]):
+            with self.assertRaises(ValidationError):
+                self.integration._receive_webhook_events(events)
+
+    def test_webhook_urls_of_several_integrations(self):
+        integrations = self.integration | self.env['dummy.erp.integration'].create({
+            'name': 'Second Integration',
+            'base_url': 'http://localhost',
+        })
+        self.assertTrue(all(url.endswith(f'/dummy_erp/webhook/{rec.id}')
+                            for rec, url in zip(integrations, integrations.mapped('webhook_url'))))
+
+    def test_failing_event_does_not_block_the_others(self):
+        product = product_payload(900007)
+        del product['title']
+        event_model = self.env['dummy.erp.webhook.event']
+        bad_event = event_model.create({
+            'integration_id': self.integration.id,
+            'resource': 'product',
+            'remote_id': 900007,
+            'payload': json.dumps(product),
+        })
+        good_event = self.integration._receive_webhook_events([
+            {'resource': 'product', 'action': 'upsert', 'data': product_payload(900008)},
+        ])
+        self.env['dummy.erp.integration'].apply_dummy_erp_webhook_events(self.integration.id)
+        self.assertEqual(bad_event.state, 'failed')
+        self.assertIn('title', bad_event.error)
+        self.assertEqual(good_event.state, 'done')
+        self.assertTrue(self.env['product.template'].search([('dummy_erp_id', '=', 900008)]))
+
+    def test_cart_events_are_applied(self):
+        self.env['product.template'].create_or_update_from_dummy_erp_payload(self.integration,
+                                                                             [product_payload(900020)])
+        self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Webhook User',
+            'login': 'webhook_user',
+            'dummy_erp_id': 900021,
+        })
+        cart = {
+            'id': 900022,
+            'userId': 900021,
+            'products': [{'id': 900020, 'price': 10, 'discountPercentage': 0, 'quantity': 1}],
+        }
+        self.integration._receive_webhook_events([{'resource': 'cart', 'data': cart}])
+        self.env['dummy.erp.integration'].apply_dummy_erp_webhook_events(self.integration.id)
+        order = self.env['sale.order'].search([('dummy_erp_id', '=', 900022)])
+        self.assertEqual(order.order_line.product_uom_qty, 1)
+        changed = dict(cart, products=[dict(cart['products'][0], quantity=3)])
+        events = self.integration._receive_webhook_events([
+            {'resource': 'cart', 'data': changed},
+            {'resource': 'cart', 'data': dict(cart, id=900023, userId=900099)},
+        ])
+        self.env['dummy.erp.integration'].apply_dummy_erp_webhook_events(self.integration.id)
+        self.assertEqual(order.order_line.product_uom_qty, 3)
+        self.assertFalse(order.update_to_dummy_erp, "A cart changed remotely should not be exported back")
+        self.assertEqual(events.mapped('state'), ['done', 'failed'], "A cart of an unknown user cannot be applied")
+        self.integration._receive_webhook_events([{'resource': 'cart', 'action': 'delete', 'data': {'id': 900022}}])
+        self.env['dummy.erp.integration'].apply_dummy_erp_webhook_events(self.integration.id)
+        self.assertEqual(order.state, 'cancel')